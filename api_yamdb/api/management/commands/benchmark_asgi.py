@@ -0,0 +1,161 @@
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+SERVERS = {
+    'wsgi': ('gthread', 'api_yamdb.wsgi:application'),
+    'asgi': ('uvicorn.workers.UvicornWorker', 'api_yamdb.asgi:application'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает gunicorn с воркерами gthread (WSGI) и uvicorn (ASGI, '
+        'асинхронное чтение) при множестве одновременных медленных '
+        'клиентов. Каждый клиент держит своё подключение, отправляет '
+        'заголовки запроса с задержкой и делает паузу между запросами. '
+        'Используется текущая база данных.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=500)
+        parser.add_argument('--requests', type=int, default=2000)
+        # Отзывы не кешируются: каждый запрос обращается к базе.
+        parser.add_argument('--path', default='/api/v1/titles/1/reviews/')
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--client-delay-ms', type=float, default=100)
+        # С --think-ms 0 клиенты нагружают сервер до предела процессора.
+        parser.add_argument('--think-ms', type=float, default=3000)
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        results = {}
+        for mode in SERVERS:
+            with self.server(mode, options):
+                results[mode] = asyncio.run(self.load(options))
+            speed, p50, p99, errors = results[mode]
+            print(
+                f'>>> {mode.upper()}: {speed:.0f} запросов/с, '
+                f'p50 - {p50:.0f} мс, p99 - {p99:.0f} мс, ошибок - {errors}'
+            )
+        print(f'    ускорение x{results["asgi"][0] / results["wsgi"][0]:.2f}')
+
+    def server(self, mode, options):
+        worker_class, application = SERVERS[mode]
+        env = {
+            **os.environ,
+            'PERF_SAMPLE_RATE': '0',
+            'PERF_SLOW_REQUEST_MS': '1000000',
+            # Метрики бенчмарка не должны попасть в каталог сервиса.
+            'PROMETHEUS_MULTIPROC_DIR': tempfile.mkdtemp(),
+        }
+        process = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn.app.wsgiapp',
+                '-c', 'gunicorn.conf.py',
+                '--bind', f'127.0.0.1:{options["port"]}',
+                '--worker-class', worker_class,
+                '--workers', str(options['workers']),
+                '--threads', str(options['threads']),
+                '--log-level', 'warning',
+                application,
+            ],
+            cwd=settings.BASE_DIR,
+            env=env,
+        )
+        return ServerProcess(process, options['port'])
+
+    async def load(self, options):
+        connections = options['connections']
+        per_connection = max(1, options['requests'] // connections)
+        latencies = []
+        errors = []
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            self.client(options, per_connection, latencies, errors)
+            for _ in range(connections)
+        ))
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+        return (
+            len(latencies) / elapsed,
+            statistics.median(latencies),
+            p99,
+            len(errors),
+        )
+
+    async def client(self, options, count, latencies, errors):
+        reader, writer = await asyncio.open_connection(
+            '127.0.0.1', options['port']
+        )
+        head = (
+            f'GET {options["path"]} HTTP/1.1\r\n'
+            f'Host: localhost\r\n'
+        ).encode()
+        delay = options['client_delay_ms'] / 1000
+        think = options['think_ms'] / 1000
+        try:
+            for _ in range(count):
+                started = time.perf_counter()
+                writer.write(head)
+                await writer.drain()
+                # Медленный клиент: сервер ждёт конца заголовков.
+                await asyncio.sleep(delay)
+                writer.write(b'\r\n')
+                await writer.drain()
+                status = await self.read_response(reader)
+                latencies.append((time.perf_counter() - started) * 1000)
+                if status != 200:
+                    errors.append(status)
+                await asyncio.sleep(think * random.uniform(0.5, 1.5))
+        finally:
+            writer.close()
+
+    async def read_response(self, reader):
+        headers = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1')
+        status_line, *lines = headers.split('\r\n')
+        length = 0
+        for line in lines:
+            name, _, value = line.partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+        await reader.readexactly(length)
+        return int(status_line.split()[1])
+
+
+class ServerProcess:
+
+    def __init__(self, process, port):
+        self.process = process
+        self.port = port
+
+    def __enter__(self):
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise CommandError('Сервер не запустился.')
+            try:
+                asyncio.run(self.ping())
+                return self
+            except OSError:
+                time.sleep(0.2)
+        self.process.kill()
+        raise CommandError('Сервер не ответил за 30 с.')
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        self.process.wait()
+
+    async def ping(self):
+        _, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.close()
@@ -0,0 +1,87 @@
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность с подключением к базе на каждый '
+        'запрос (CONN_MAX_AGE=0) и с постоянными подключениями. Запросы '
+        'проходят через WSGI-обработчик в нескольких потоках, как в '
+        'воркере gthread.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--threads', type=int, default=4)
+        # Отзывы не кешируются: каждый запрос обращается к базе.
+        parser.add_argument('--path', default='/api/v1/titles/1/reviews/')
+        parser.add_argument('--max-age', type=int, default=60)
+
+    def handle(self, *args, **options):
+        application = get_wsgi_application()
+        # Замеры запросов пишут в лог и не должны влиять на результат.
+        settings.PERF_SAMPLE_RATE = 0
+        results = {}
+        for max_age in (0, options['max_age']):
+            results[max_age] = self.run(application, max_age, options)
+            speed, opened = results[max_age]
+            print(
+                f'>>> CONN_MAX_AGE={max_age}: {speed:.0f} запросов/с, '
+                f'открыто подключений - {opened}'
+            )
+        before, after = results[0][0], results[options['max_age']][0]
+        print(f'    ускорение x{after / before:.2f}')
+
+    def run(self, application, max_age, options):
+        for database in settings.DATABASES.values():
+            database['CONN_MAX_AGE'] = max_age
+        opened = []
+        lock = threading.Lock()
+
+        def count_connection(sender, connection, **kwargs):
+            with lock:
+                opened.append(connection.alias)
+
+        def worker(count):
+            for _ in range(count):
+                self.request(application, options['path'])
+            connections.close_all()
+
+        threads = options['threads']
+        per_thread = options['requests'] // threads
+        connection_created.connect(count_connection)
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(threads) as executor:
+                list(executor.map(worker, [per_thread] * threads))
+        finally:
+            connection_created.disconnect(count_connection)
+        elapsed = time.perf_counter() - started
+        return per_thread * threads / elapsed, len(opened)
+
+    def request(self, application, path):
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'HTTP_HOST': 'localhost',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.url_scheme': 'http',
+        }
+        response = application(environ, lambda status, headers: None)
+        try:
+            for _ in response:
+                pass
+        finally:
+            # Как WSGI-сервер: close() отправляет request_finished.
+            response.close()
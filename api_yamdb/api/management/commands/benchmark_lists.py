@@ -0,0 +1,99 @@
+import time
+
+from api.v1.renderers import FastJSONRenderer
+from api.v1.rows import CommentRows, ReviewRows, TitleRows
+from api.v1.serializers import (CommentSerializer, ReviewSerializer,
+                                TitleReadSerializer)
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает построение списков произведений, отзывов и комментариев: '
+        'ModelSerializer + JSONRenderer и values() + FastJSONRenderer. '
+        'Данные создаются во временной транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options['rows'])
+            titles = Title.objects.select_related('category').prefetch_related(
+                Prefetch('genre', queryset=Genre.objects.only('name', 'slug'))
+            ).order_by('id')
+            reviews = Review.objects.select_related('author', 'title')
+            comments = Comment.objects.select_related('author', 'review')
+            for name, queryset, serializer_class, rows in (
+                ('titles', titles, TitleReadSerializer, TitleRows()),
+                ('reviews', reviews, ReviewSerializer, ReviewRows()),
+                ('comments', comments, CommentSerializer, CommentRows()),
+            ):
+                self.report(
+                    name, queryset, serializer_class, rows, options['repeat']
+                )
+            transaction.set_rollback(True)
+
+    def seed(self, count):
+        category = Category.objects.create(name='Бенчмарк', slug='bench')
+        genres = [
+            Genre.objects.create(name=f'Бенчмарк {i}', slug=f'bench-{i}')
+            for i in range(3)
+        ]
+        author = User.objects.create(
+            username='bench-author', email='bench-author@yamdb.fake'
+        )
+        titles = [
+            Title.objects.create(
+                name=f'Бенчмарк {i}', year=2000, category=category,
+                description='Описание',
+            )
+            for i in range(count)
+        ]
+        Title.genre.through.objects.bulk_create(
+            Title.genre.through(title_id=title.pk, genre_id=genre.pk)
+            for title in titles
+            for genre in genres
+        )
+        Review.objects.bulk_create(
+            Review(title=title, author=author, text='Отзыв', score=7)
+            for title in titles
+        )
+        Comment.objects.bulk_create(
+            Comment(review=review, author=author, text='Комментарий')
+            for review in Review.objects.filter(title__in=titles)
+        )
+
+    def measure(self, build, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            count = build()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return count / best
+
+    def report(self, name, queryset, serializer_class, rows, repeat):
+        def serializer():
+            data = serializer_class(queryset, many=True).data
+            JSONRenderer().render(data)
+            return len(data)
+
+        def values():
+            data = rows.to_representation(rows.values(queryset))
+            FastJSONRenderer().render(data)
+            return len(data)
+
+        before = self.measure(serializer, repeat)
+        after = self.measure(values, repeat)
+        print(
+            f'>>> {name}: сериализатор - {before:,.0f} строк/с, '
+            f'values() - {after:,.0f} строк/с, ускорение x{after / before:.1f}'
+        )
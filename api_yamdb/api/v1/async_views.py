@@ -0,0 +1,76 @@
+"""Асинхронные view для чтения под ASGI.
+
+В Django 3.2 нет асинхронного ORM, поэтому чтение выполняется через
+``sync_to_async`` в отдельном ограниченном пуле потоков: цикл событий
+обслуживает сколько угодно медленных клиентов, а к базе одновременно
+обращаются не больше ASYNC_DB_THREADS потоков, каждый со своим
+постоянным подключением. Запись остаётся синхронной и выполняется в
+потоке Django, как обычная view.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import URLPattern
+
+from api_yamdb.db_health import check_connections, mark_connections_idle
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Маршруты роутера, которые под ASGI читаются асинхронно.
+ASYNC_READ_ROUTES = (
+    'titles-list', 'titles-detail', 'reviews-list', 'comments-list',
+)
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_DB_THREADS, thread_name_prefix='yamdb-db'
+)
+
+
+def call_view(view, request, *args, **kwargs):
+    """Выполняет view в потоке так же, как WSGI-обработчик запрос.
+
+    Подключения потока проверяются до и после (как по сигналам
+    request_started и request_finished), ответ отрисовывается здесь же,
+    чтобы не занимать им общий поток Django.
+    """
+    close_old_connections()
+    check_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    finally:
+        mark_connections_idle()
+        close_old_connections()
+
+
+def async_read(view):
+    read = sync_to_async(
+        partial(call_view, view), thread_sensitive=False, executor=executor
+    )
+    write = sync_to_async(partial(call_view, view))
+
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return await read(request, *args, **kwargs)
+        return await write(request, *args, **kwargs)
+
+    return async_view
+
+
+def async_read_urls(patterns):
+    """Заменяет view маршрутов ASYNC_READ_ROUTES асинхронными."""
+    return [
+        URLPattern(
+            pattern.pattern,
+            async_read(pattern.callback),
+            pattern.default_args,
+            pattern.name,
+        )
+        if pattern.name in ASYNC_READ_ROUTES else pattern
+        for pattern in patterns
+    ]
@@ -0,0 +1,101 @@
+"""JWT-аутентификация без запроса пользователя в базу.
+
+Роль, признак суперпользователя и логин кладутся в токен при выдаче.
+Пользователь собирается из этих claims; остальные поля отложены (deferred)
+и при обращении к ним загружаются из базы.
+
+При изменении или удалении пользователя в кеш пишется отметка времени.
+Токены, выданные до неё, проверяются по базе, поэтому понижение роли
+действует сразу, а не после истечения токена. Отметку видят все воркеры,
+только если кеш общий (gunicorn.conf.py не запускает несколько воркеров с
+кешем в памяти процесса); изменения через ``QuerySet.update()`` отметку
+не ставят. Поэтому запросы на запись всегда проверяют пользователя по
+основной базе, а claims используются только для чтения.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router
+from django.db.models import DEFERRED
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import User
+
+CLAIM_FIELDS = ('username', 'role', 'is_superuser')
+CHANGED_PREFIX = 'auth:user-changed:'
+
+
+def get_token_for_user(user):
+    token = AccessToken.for_user(user)
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    return token
+
+
+def mark_user_changed(user_id):
+    caches[settings.AUTH_CLAIMS_CACHE_ALIAS].set(
+        f'{CHANGED_PREFIX}{user_id}',
+        time.time(),
+        settings.AUTH_CLAIMS_CHANGE_TTL,
+    )
+
+
+def user_from_claims(token):
+    """Экземпляр User из claims токена, без обращения к базе."""
+    claims = {
+        User._meta.pk.attname: token[api_settings.USER_ID_CLAIM],
+        **{field: token[field] for field in CLAIM_FIELDS},
+    }
+    fields = User._meta.concrete_fields
+    return User.from_db(
+        router.db_for_read(User),
+        [field.attname for field in fields if field.attname in claims],
+        [claims.get(field.attname, DEFERRED) for field in fields],
+    )
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    check_primary = False
+
+    def authenticate(self, request):
+        self.check_primary = request.method not in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(
+                'Token contained no recognizable user identification'
+            )
+        if self.check_primary or not all(
+            # Без claims - токен выдан до их появления.
+            field in validated_token for field in CLAIM_FIELDS
+        ):
+            return self.get_primary_user(validated_token)
+        changed = caches[settings.AUTH_CLAIMS_CACHE_ALIAS].get(
+            f'{CHANGED_PREFIX}{validated_token[api_settings.USER_ID_CLAIM]}'
+        )
+        if changed is not None and validated_token.get('iat', 0) <= changed:
+            return self.get_primary_user(validated_token)
+        return user_from_claims(validated_token)
+
+    def get_primary_user(self, validated_token):
+        """Пользователь из основной базы: реплика может отставать."""
+        try:
+            user = User.objects.using(router.db_for_write(User)).get(**{
+                api_settings.USER_ID_FIELD:
+                    validated_token[api_settings.USER_ID_CLAIM]
+            })
+        except User.DoesNotExist:
+            raise AuthenticationFailed(
+                'User not found', code='user_not_found'
+            )
+        if not user.is_active:
+            raise AuthenticationFailed(
+                'User is inactive', code='user_inactive'
+            )
+        return user
@@ -0,0 +1,168 @@
+from itertools import islice
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from reviews.models import Title
+
+from .cache import bump_versions
+from .serializers import TitleWriteSerializer
+
+
+def batches(items, size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+class TitleBulkWriter:
+    """Массовое создание и изменение произведений.
+
+    Элемент с ``id`` частично обновляет существующее произведение,
+    без ``id`` - создаёт новое. Данные проверяются TitleWriteSerializer
+    пачками; каждая пачка записывается одним bulk_create (bulk_update)
+    для произведений и одним bulk_create для связей с жанрами.
+    В режиме atomic ошибка в любом элементе отменяет всё.
+    """
+
+    def __init__(self, context, atomic=True, batch_size=None):
+        self.context = context
+        self.atomic = atomic
+        self.batch_size = batch_size or settings.TITLES_BULK_BATCH_SIZE
+        self.results = []
+        self.written = 0
+        self.failed = 0
+        self.changed_ids = set()
+
+    @property
+    def status_code(self):
+        if self.failed and (self.atomic or not self.written):
+            return status.HTTP_400_BAD_REQUEST
+        if self.failed:
+            return status.HTTP_207_MULTI_STATUS
+        if all(r['status'] == status.HTTP_201_CREATED for r in self.results):
+            return status.HTTP_201_CREATED
+        return status.HTTP_200_OK
+
+    def run(self, items):
+        if self.atomic:
+            with transaction.atomic():
+                for batch in batches(items, self.batch_size):
+                    self.process(batch, write=not self.failed)
+                if self.failed:
+                    transaction.set_rollback(True)
+                    self.mark_rolled_back()
+        else:
+            for batch in batches(items, self.batch_size):
+                with transaction.atomic():
+                    self.process(batch, write=True)
+        if self.written:
+            # bulk_create и bulk_update не отправляют сигналы.
+            bump_versions(
+                'titles-list',
+                *(f'titles-{pk}' for pk in sorted(self.changed_ids)),
+            )
+        return self.results
+
+    def mark_rolled_back(self):
+        self.written = 0
+        self.changed_ids.clear()
+        for result in self.results:
+            if result['status'] in (
+                status.HTTP_200_OK, status.HTTP_201_CREATED
+            ):
+                result['status'] = status.HTTP_424_FAILED_DEPENDENCY
+                result.pop('id', None)
+
+    def fail(self, errors, code=status.HTTP_400_BAD_REQUEST):
+        self.failed += 1
+        self.results.append({
+            'index': len(self.results),
+            'status': code,
+            'errors': errors,
+        })
+
+    def process(self, batch, write):
+        existing = Title.objects.in_bulk([
+            item['id'] for item in batch
+            if isinstance(item, dict) and isinstance(item.get('id'), int)
+        ])
+        created, updated = [], []
+        for item in batch:
+            if isinstance(item, ParseError):
+                self.fail({'non_field_errors': [str(item.detail)]})
+                continue
+            instance = None
+            if isinstance(item, dict) and 'id' in item:
+                instance = existing.get(item['id'])
+                if instance is None:
+                    self.fail(
+                        {'id': ['Произведение не найдено.']},
+                        status.HTTP_404_NOT_FOUND,
+                    )
+                    continue
+            serializer = TitleWriteSerializer(
+                instance,
+                data=item,
+                partial=instance is not None,
+                context=self.context,
+            )
+            if not serializer.is_valid():
+                self.fail(serializer.errors)
+                continue
+            data = dict(serializer.validated_data)
+            genres = data.pop('genre', None)
+            result = {'index': len(self.results)}
+            self.results.append(result)
+            if instance is None:
+                result['status'] = status.HTTP_201_CREATED
+                created.append((result, Title(**data), genres or []))
+            else:
+                result['status'] = status.HTTP_200_OK
+                for field, value in data.items():
+                    setattr(instance, field, value)
+                updated.append((result, instance, genres, list(data)))
+        if write:
+            self.write(created, updated)
+
+    def write(self, created, updated):
+        if created:
+            titles = [title for _, title, _ in created]
+            connection = connections[router.db_for_write(Title)]
+            if connection.features.can_return_rows_from_bulk_insert:
+                Title.objects.bulk_create(titles)
+            else:
+                # Без RETURNING (SQLite) идентификаторы получаем поштучно.
+                for title in titles:
+                    title.save()
+        if updated:
+            fields = {field for *_, fields in updated for field in fields}
+            if fields:
+                Title.objects.bulk_update(
+                    [title for _, title, _, _ in updated], fields
+                )
+        relinked = [
+            (title, genres) for _, title, genres in created
+        ] + [
+            (title, genres) for _, title, genres, _ in updated
+            if genres is not None
+        ]
+        through = Title.genre.through
+        stale = [
+            title.pk for _, title, genres, _ in updated if genres is not None
+        ]
+        if stale:
+            through.objects.filter(title_id__in=stale).delete()
+        through.objects.bulk_create([
+            through(title_id=title.pk, genre_id=genre_id)
+            for title, genres in relinked
+            for genre_id in {genre.pk for genre in genres}
+        ])
+        for result, title, *_ in created + updated:
+            result['id'] = title.pk
+            self.changed_ids.add(title.pk)
+        self.written += len(created) + len(updated)
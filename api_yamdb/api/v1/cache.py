@@ -0,0 +1,100 @@
+"""Кеш ответов каталога (произведения, жанры, категории).
+
+Ключ ответа строится из пути, нормализованных параметров запроса и номеров
+версий. Изменение данных не очищает кеш, а увеличивает версию: старые
+записи перестают использоваться и вытесняются по таймауту.
+
+Версии:
+    ``<namespace>``           - весь раздел (например, переименован жанр);
+    ``<namespace>-list``      - любые списки раздела;
+    ``<namespace>-<pk>``      - отдельный объект.
+
+Реплика отстаёт от основной базы, поэтому DB_REPLICA_STICKY_SECONDS
+секунд после увеличения версии ответ, прочитанный с реплики, под новой
+версией не сохраняется (см. ``recently_bumped``): иначе старые данные
+попали бы в кеш и их увидел бы даже записавший клиент, который читает с
+основной базы.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from api_yamdb import db_router
+
+VERSION_PREFIX = 'catalog:version:'
+BUMPED_PREFIX = 'catalog:bumped:'
+RESPONSE_PREFIX = 'catalog:response:'
+
+
+def get_cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def _initial_version():
+    # Версия по времени не совпадёт с версией вытесненного ключа.
+    return int(time.time() * 1000)
+
+
+def get_versions(names):
+    cache = get_cache()
+    keys = [VERSION_PREFIX + name for name in names]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*names):
+    cache = get_cache()
+    for name in names:
+        key = VERSION_PREFIX + name
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), timeout=None)
+    if db_router.replica_configured():
+        cache.set_many(
+            {BUMPED_PREFIX + name: True for name in names},
+            settings.DB_REPLICA_STICKY_SECONDS,
+        )
+
+
+def recently_bumped(names):
+    """Увеличивалась ли одна из версий за время возможного отставания
+    реплики."""
+    return bool(get_cache().get_many([BUMPED_PREFIX + name for name in names]))
+
+
+def normalize_query(query_params):
+    return '&'.join(
+        f'{key}={value}'
+        for key, values in sorted(query_params.lists())
+        for value in sorted(values)
+        if value != ''
+    )
+
+
+def build_key(request, version_names):
+    versions = get_versions(version_names)
+    raw = '|'.join((
+        request.path,
+        normalize_query(request.query_params),
+        ','.join(map(str, versions)),
+    ))
+    return RESPONSE_PREFIX + hashlib.md5(raw.encode()).hexdigest()
+
+
+def build_etag(key):
+    return f'W/"{key[len(RESPONSE_PREFIX):]}"'
+
+
+def etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    tags = {tag.strip() for tag in header.split(',')}
+    return '*' in tags or etag in tags or etag[2:] in tags
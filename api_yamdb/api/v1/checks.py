@@ -0,0 +1,39 @@
+"""Проверки настроек для ``manage.py check --deploy``."""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+# Настройки с алиасами кешей, которые должны быть общими для всех
+# процессов: версии кеша каталога, отметки об отзыве токенов и привязка
+# клиентов к основной базе. В кеше процесса их видит только записавший
+# воркер.
+SHARED_CACHE_SETTINGS = (
+    'CATALOG_CACHE_ALIAS',
+    'AUTH_CLAIMS_CACHE_ALIAS',
+    'DB_REPLICA_CACHE_ALIAS',
+)
+
+
+def is_process_local(alias):
+    return settings.CACHES[alias]['BACKEND'] in PROCESS_LOCAL_CACHES
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    return [
+        Warning(
+            f'{name} использует кеш "{getattr(settings, name)}" в памяти '
+            f'процесса.',
+            hint=(
+                'Версии и отметки в нём видит только записавший их воркер. '
+                'Укажите общий кеш в CACHE_BACKEND и CACHE_LOCATION '
+                '(например, memcached).'
+            ),
+            id='api.W001',
+        )
+        for name in SHARED_CACHE_SETTINGS
+        if is_process_local(getattr(settings, name))
+    ]
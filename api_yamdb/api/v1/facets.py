@@ -0,0 +1,69 @@
+"""Фасеты списка произведений (``/api/v1/titles/?facets=true``).
+
+Для текущего набора фильтров считается число произведений в каждом
+жанре, категории и интервале лет длиной TITLES_FACET_YEAR_BUCKET. Каждый
+фасет - один запрос с GROUP BY по подзапросу id отфильтрованных
+произведений, а не запрос на каждое значение.
+"""
+from django.conf import settings
+from django.db.models import Count, FloatField, IntegerField
+from django.db.models.functions import Cast, Floor
+from reviews.models import Title
+
+FACETS_PARAM = 'facets'
+TRUE_VALUES = ('1', 'true')
+
+
+def facets_requested(request):
+    return request.query_params.get(FACETS_PARAM, '').lower() in TRUE_VALUES
+
+
+def year_bucket(size):
+    # Floor, а не деление целых: -5 попадает в интервал [-10, -1].
+    return Cast(
+        Floor(Cast('year', FloatField()) / size), IntegerField()
+    ) * size
+
+
+def title_facets(queryset):
+    titles = queryset.order_by().values('pk')
+    genres = Title.genre.through.objects.filter(
+        title__in=titles, genre__isnull=False
+    ).values('genre__slug', 'genre__name').annotate(
+        count=Count('title', distinct=True)
+    ).order_by('-count', 'genre__slug')
+    categories = Title.objects.filter(
+        pk__in=titles, category__isnull=False
+    ).values('category__slug', 'category__name').annotate(
+        count=Count('pk')
+    ).order_by('-count', 'category__slug')
+    size = settings.TITLES_FACET_YEAR_BUCKET
+    years = Title.objects.filter(pk__in=titles).annotate(
+        year_from=year_bucket(size)
+    ).values('year_from').annotate(count=Count('pk')).order_by('-year_from')
+    return {
+        'genre': [
+            {
+                'slug': row['genre__slug'],
+                'name': row['genre__name'],
+                'count': row['count'],
+            }
+            for row in genres
+        ],
+        'category': [
+            {
+                'slug': row['category__slug'],
+                'name': row['category__name'],
+                'count': row['count'],
+            }
+            for row in categories
+        ],
+        'year': [
+            {
+                'from': row['year_from'],
+                'to': row['year_from'] + size - 1,
+                'count': row['count'],
+            }
+            for row in years
+        ],
+    }
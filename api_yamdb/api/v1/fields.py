@@ -0,0 +1,109 @@
+import time
+
+from django.utils.encoding import smart_str
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+from .cache import get_versions
+
+# Справочники больше этого размера в памяти процесса не держим.
+SLUG_TABLE_MAX_ROWS = 1000
+
+# Сколько секунд таблица живёт без перечитывания, даже если версия раздела
+# не менялась (массовая запись без сигналов, версия в кеше другого
+# процесса).
+SLUG_TABLE_TTL = 60
+
+# namespace -> (версия, время загрузки, {slug: объект} или None для
+# больших таблиц).
+SLUG_TABLES = {}
+
+
+def get_slug_table(namespace, queryset, slug_field):
+    """Таблица slug -> объект, общая для запросов одного процесса.
+
+    Перечитывается, когда сигналы увеличивают версию раздела кеша
+    каталога (см. api.v1.cache и api.v1.signals), и не реже раза в
+    SLUG_TABLE_TTL секунд.
+    """
+    version = get_versions([namespace])[0]
+    cached = SLUG_TABLES.get(namespace)
+    if (
+        cached is not None and cached[0] == version
+        and time.monotonic() - cached[1] < SLUG_TABLE_TTL
+    ):
+        return cached[2]
+    objects = list(queryset.all()[:SLUG_TABLE_MAX_ROWS + 1])
+    table = None
+    if len(objects) <= SLUG_TABLE_MAX_ROWS:
+        table = {getattr(obj, slug_field): obj for obj in objects}
+    SLUG_TABLES[namespace] = (version, time.monotonic(), table)
+    return table
+
+
+class CachedSlugListField(serializers.ManyRelatedField):
+    """Список slug'ов, который разрешается одним запросом (или из кеша)."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        found = self.child_relation.resolve(data)
+        return [self.child_relation.pick(found, item) for item in data]
+
+
+class CachedSlugRelatedField(serializers.SlugRelatedField):
+    """SlugRelatedField, который берёт объекты из таблицы в памяти.
+
+    Сообщения об ошибках те же, что у SlugRelatedField.
+    """
+
+    def __init__(self, cache_namespace=None, **kwargs):
+        self.cache_namespace = cache_namespace
+        super().__init__(**kwargs)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return CachedSlugListField(**list_kwargs)
+
+    def resolve(self, values):
+        slugs = {
+            smart_str(value) for value in values
+            if isinstance(value, (str, int))
+        }
+        queryset = self.get_queryset()
+        found = {}
+        if self.cache_namespace is not None:
+            table = get_slug_table(
+                self.cache_namespace, queryset, self.slug_field
+            )
+            if table is not None:
+                found = {slug: table[slug] for slug in slugs if slug in table}
+                # Нет в таблице - возможно, добавлен после её загрузки.
+                slugs -= found.keys()
+        if slugs:
+            found.update(
+                (getattr(obj, self.slug_field), obj)
+                for obj in queryset.filter(
+                    **{f'{self.slug_field}__in': slugs}
+                )
+            )
+        return found
+
+    def pick(self, found, data):
+        if not isinstance(data, (str, int)):
+            self.fail('invalid')
+        value = smart_str(data)
+        if value not in found:
+            self.fail(
+                'does_not_exist', slug_name=self.slug_field, value=value
+            )
+        return found[value]
+
+    def to_internal_value(self, data):
+        return self.pick(self.resolve([data]), data)
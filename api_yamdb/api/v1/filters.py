@@ -1,5 +1,51 @@
+from django.db.models import F
 from django_filters import rest_framework
+from rest_framework import filters
 from reviews.models import Title
+from reviews.search import rank_by_similarity
+
+
+class TrigramSearchFilter(filters.SearchFilter):
+    """SearchFilter с ранжированием по релевантности на PostgreSQL.
+
+    Фильтрация остаётся icontains, её ускоряют GIN-индексы pg_trgm
+    по UPPER(поле).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        queryset = super().filter_queryset(request, queryset, view)
+        if not search_fields:
+            return queryset
+        return rank_by_similarity(
+            queryset,
+            [field.lstrip('^=@$') for field in search_fields],
+            ' '.join(self.get_search_terms(request)),
+        )
+
+
+class NullsLastOrderingFilter(filters.OrderingFilter):
+    """OrderingFilter, который ставит NULL в конец в обоих направлениях.
+
+    Иначе на PostgreSQL ``?ordering=-rating`` начинается с произведений
+    без оценок. Поля перечислены в ``nulls_last_fields`` вьюсета.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        nulls_last = getattr(view, 'nulls_last_fields', ())
+        if not ordering or not nulls_last:
+            return ordering
+        return [self.nulls_last(field, nulls_last) for field in ordering]
+
+    @staticmethod
+    def nulls_last(field, nulls_last):
+        name = field.lstrip('-')
+        if name not in nulls_last:
+            return field
+        if field.startswith('-'):
+            return F(name).desc(nulls_last=True)
+        return F(name).asc(nulls_last=True)
 
 
 class TitleFilter(rest_framework.FilterSet):
@@ -11,12 +57,25 @@ class TitleFilter(rest_framework.FilterSet):
     )
     name = rest_framework.CharFilter(
         field_name='name',
-        lookup_expr='icontains'
+        method='filter_name'
     )
     year = rest_framework.NumberFilter(
         field_name='year'
     )
+    rating_min = rest_framework.NumberFilter(
+        field_name='rating',
+        lookup_expr='gte'
+    )
+    rating_max = rest_framework.NumberFilter(
+        field_name='rating',
+        lookup_expr='lte'
+    )
+
+    def filter_name(self, queryset, name, value):
+        return rank_by_similarity(
+            queryset.filter(name__icontains=value), ('name',), value
+        )
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = ('category', 'genre', 'name', 'year', 'description')
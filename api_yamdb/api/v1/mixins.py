@@ -1,4 +1,13 @@
-from rest_framework import mixins, viewsets
+from django.conf import settings
+from rest_framework import mixins, status, viewsets
+from rest_framework.response import Response
+
+from api_yamdb.db_router import use_replica
+from api_yamdb.metrics import CACHE_REQUESTS
+from api_yamdb.performance import measure
+
+from . import cache
+from .sparse import get_requested_fields
 
 
 class CreateListDestroyMixinSet(
@@ -8,3 +17,144 @@ class CreateListDestroyMixinSet(
     viewsets.GenericViewSet
 ):
     pass
+
+
+class CursorPaginationMixin:
+    """Позволяет клиенту выбрать пагинацию по курсору для запроса.
+
+    Включается параметром ``?pagination=cursor``; ссылки next/previous
+    содержат параметр ``cursor`` и сохраняют выбранный режим.
+    """
+    cursor_pagination_class = None
+    cursor_query_param = 'cursor'
+    pagination_query_param = 'pagination'
+
+    def use_cursor_pagination(self):
+        params = self.request.query_params
+        return self.cursor_pagination_class is not None and (
+            params.get(self.pagination_query_param) == 'cursor'
+            or self.cursor_query_param in params
+        )
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.use_cursor_pagination():
+                self._paginator = self.cursor_pagination_class()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
+
+
+class SparseQuerysetMixin:
+    """Сужает запрос чтения под ?fields= и ?omit= (см. ``sparse``).
+
+    ``sparse_fields`` - поле ответа -> поля модели для ``.only()``;
+    ``sparse_related`` - поле ответа -> связи для select_related;
+    ``sparse_prefetch`` - поле ответа -> аргументы prefetch_related.
+    Связи невыбранных полей не загружаются.
+    """
+    sparse_fields = {}
+    sparse_related = {}
+    sparse_prefetch = {}
+
+    def get_requested_fields(self):
+        return get_requested_fields(self.request, self.sparse_fields)
+
+    def narrow_queryset(self, queryset):
+        selected = self.get_requested_fields()
+        if selected is None:
+            return queryset
+        related = [
+            lookup for name in selected
+            for lookup in self.sparse_related.get(name, ())
+        ]
+        prefetch = [
+            lookup for name in selected
+            for lookup in self.sparse_prefetch.get(name, ())
+        ]
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset.only(*(
+            field for name in selected for field in self.sparse_fields[name]
+        ))
+
+    def filter_queryset(self, queryset):
+        return self.narrow_queryset(super().filter_queryset(queryset))
+
+
+class FastListMixin(SparseQuerysetMixin):
+    """list без ModelSerializer: строки страницы строятся из ``.values()``.
+
+    ``list_rows`` - экземпляр ``rows.ValuesRows`` с тем же видом ответа,
+    что у сериализатора вьюсета.
+    """
+    list_rows = None
+
+    def list(self, request, *args, **kwargs):
+        fields = self.get_requested_fields()
+        queryset = self.list_rows.values(
+            self.filter_queryset(self.get_queryset()), fields
+        )
+        page = self.paginate_queryset(queryset)
+        with measure('serialize'):
+            data = self.list_rows.to_representation(
+                queryset if page is None else page, fields
+            )
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+
+class CachedReadMixin:
+    """Кеширует ответы list и retrieve с поддержкой ETag.
+
+    Ответ 304 отдаётся без обращения к базе и сериализации. Версии ключей
+    увеличивают сигналы из ``api.v1.signals``.
+    """
+    cache_namespace = None
+
+    def get_cache_version_names(self):
+        namespace = self.cache_namespace
+        if self.action == 'retrieve':
+            lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+            return [namespace, f'{namespace}-{lookup}']
+        return [namespace, f'{namespace}-list']
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        names = self.get_cache_version_names()
+        key = cache.build_key(request, names)
+        etag = cache.build_etag(key)
+        if cache.etag_matches(request, etag):
+            CACHE_REQUESTS.labels(self.cache_namespace, 'not_modified').inc()
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            data = cache.get_cache().get(key)
+            if data is not None:
+                CACHE_REQUESTS.labels(self.cache_namespace, 'hit').inc()
+                response = Response(data)
+            else:
+                CACHE_REQUESTS.labels(self.cache_namespace, 'miss').inc()
+                response = handler(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                if use_replica.get() and cache.recently_bumped(names):
+                    # Реплика могла ещё не получить запись: ответ не
+                    # сохраняется и не получает ETag новой версии.
+                    return response
+                cache.get_cache().set(
+                    key, response.data, settings.CATALOG_CACHE_TIMEOUT
+                )
+        response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
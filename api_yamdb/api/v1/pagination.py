@@ -0,0 +1,197 @@
+import hashlib
+import json
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+from api_yamdb.db_router import use_replica
+
+from . import cache as catalog_cache
+
+COUNT_PREFIX = 'pagination:count:'
+TABLE_SIZE_PREFIX = 'pagination:table-size:'
+
+
+class ReviewCursorPagination(CursorPagination):
+    """Пагинация отзывов по курсору, без COUNT и OFFSET."""
+    ordering = '-id'
+
+
+class CommentCursorPagination(CursorPagination):
+    """Пагинация комментариев по курсору, без COUNT и OFFSET."""
+    ordering = 'id'
+
+
+class EstimatedPage(Page):
+    """Страница, которая сама знает, есть ли следующая."""
+
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator с оценкой числа строк от планировщика PostgreSQL.
+
+    Размер таблицы (``pg_class.reltuples``) кешируется на
+    PAGINATION_TABLE_SIZE_CACHE_TIMEOUT секунд. Если таблица меньше
+    PAGINATION_EXACT_COUNT_THRESHOLD, выполняется точный COUNT без
+    дополнительных запросов. Для большой таблицы запрос без условий берёт
+    оценку из ``reltuples``, остальные - из ``EXPLAIN``; оценка ниже порога
+    заменяется точным COUNT. Результат кешируется на
+    PAGINATION_COUNT_CACHE_TIMEOUT секунд по тексту запроса и ``versions``
+    (версиям кеша каталога); при ``versions=None`` не кешируется. Страницы
+    при оценке не ограничиваются сверху: следующая страница определяется
+    по лишней строке выборки.
+    """
+    approximate = False
+
+    def __init__(self, *args, versions=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.versions = versions
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        try:
+            raw = str(queryset.order_by().query)
+        except EmptyResultSet:
+            return 0
+        cache = caches[settings.PAGINATION_COUNT_CACHE_ALIAS]
+        if self.versions is not None:
+            raw += '|' + ','.join(map(str, self.versions))
+            key = COUNT_PREFIX + hashlib.md5(raw.encode()).hexdigest()
+            cached = cache.get(key)
+            if cached is not None:
+                self.approximate = cached[0]
+                return cached[1]
+        estimate = self.estimate(queryset)
+        self.approximate = (
+            estimate is not None
+            and estimate >= settings.PAGINATION_EXACT_COUNT_THRESHOLD
+        )
+        count = estimate if self.approximate else queryset.count()
+        if self.versions is not None:
+            cache.set(
+                key, (self.approximate, count),
+                settings.PAGINATION_COUNT_CACHE_TIMEOUT,
+            )
+        return count
+
+    def table_size(self, queryset):
+        """``reltuples`` таблицы модели из кеша или pg_class."""
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        table = queryset.model._meta.db_table
+        cache = caches[settings.PAGINATION_COUNT_CACHE_ALIAS]
+        key = f'{TABLE_SIZE_PREFIX}{queryset.db}:{table}'
+        size = cache.get(key)
+        if size is None:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                    [table],
+                )
+                row = cursor.fetchone()
+            # -1 - таблица ещё не анализировалась.
+            size = int(row[0]) if row else -1
+            cache.set(
+                key, size, settings.PAGINATION_TABLE_SIZE_CACHE_TIMEOUT
+            )
+        return size if size >= 0 else None
+
+    def estimate(self, queryset):
+        size = self.table_size(queryset)
+        if size is None or size < settings.PAGINATION_EXACT_COUNT_THRESHOLD:
+            return None
+        query = queryset.order_by().query
+        if not query.where and not query.distinct:
+            return size
+        sql, params = query.sql_with_params()
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def validate_number(self, number):
+        if not self.approximate:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            return super().validate_number(number)
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1')
+        return number
+
+    def page(self, number):
+        # count заодно определяет, приблизительное ли оно.
+        if not self.count or not self.approximate:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('Страница не содержит результатов')
+        return EstimatedPage(
+            rows[:self.per_page], number, self,
+            has_more=len(rows) > self.per_page,
+        )
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """PageNumberPagination с приблизительным ``count`` на больших выборках.
+
+    Поле ``count_approximate`` показывает, оценка ли ``count``. Для
+    представлений с кешем каталога (``CachedReadMixin``) кеш ``count``
+    привязан к версиям каталога: после записи список не собирается со
+    старым числом строк.
+    """
+    django_paginator_class = EstimatedCountPaginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.django_paginator_class = partial(
+            type(self).django_paginator_class,
+            versions=self.get_count_versions(view),
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count_versions(self, view):
+        get_names = getattr(view, 'get_cache_version_names', None)
+        if get_names is None:
+            return ()
+        names = get_names()
+        if use_replica.get() and catalog_cache.recently_bumped(names):
+            # Реплика могла ещё не получить запись.
+            return None
+        return catalog_cache.get_versions(names)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.page.paginator.count,
+            'count_approximate': self.page.paginator.approximate,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema['properties']['count_approximate'] = {
+            'type': 'boolean',
+            'example': False,
+        }
+        return schema
@@ -0,0 +1,32 @@
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """Поток JSON-объектов, по одному на строку.
+
+    Строки читаются лениво, по мере обхода результата. Строка с ошибкой
+    разбора возвращается как экземпляр ParseError, чтобы её можно было
+    отметить в ответе, не прерывая остальные.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        return self.iter_lines(stream, encoding)
+
+    def iter_lines(self, stream, encoding):
+        if stream is None:
+            return
+        for number, line in enumerate(stream, start=1):
+            line = line.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                yield ParseError(f'Строка {number}: {error}')
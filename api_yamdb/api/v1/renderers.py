@@ -0,0 +1,43 @@
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import JSONRenderer
+
+from api_yamdb.performance import measure
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson, если он установлен.
+
+    Отступы (``?indent`` в Accept) и отсутствие orjson обрабатывает
+    обычный JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with measure('render'):
+            return self.dump(data, accepted_media_type, renderer_context)
+
+    def dump(self, data, accepted_media_type, renderer_context):
+        if orjson is None or data is None or self.get_indent(
+            accepted_media_type, renderer_context or {}
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=orjson.OPT_NON_STR_KEYS,
+        )
+
+
+class FirstRendererNegotiation(DefaultContentNegotiation):
+    """Всегда первый рендерер вьюхи.
+
+    Для вьюх, которые сами разбирают ``?format=`` (потоковая выгрузка):
+    иначе DRF ищет рендерер с таким форматом и отвечает 404.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
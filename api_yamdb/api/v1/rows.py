@@ -0,0 +1,122 @@
+"""Быстрое построение списков без ModelSerializer.
+
+Строки страницы берутся из ``.values()`` и превращаются в словари того же
+вида, что отдаёт сериализатор: те же ключи в том же порядке и те же типы
+значений. Набор полей и их преобразования берутся из самого сериализатора,
+поэтому новое поле в нём достаточно описать в ``sources``, если его путь
+для ``values()`` отличается от имени.
+"""
+from collections import defaultdict
+
+from django.utils.functional import cached_property
+from rest_framework import serializers
+from reviews.models import Title
+
+from .serializers import (CommentSerializer, ReviewSerializer,
+                          TitleReadSerializer)
+
+
+class ValuesRows:
+    serializer_class = None
+    # Поле сериализатора -> путь для values(), если он отличается от имени.
+    sources = {}
+    # Поля, которые заполняет prepare(), -> нужные для этого колонки.
+    prepared = {}
+
+    @staticmethod
+    def get_converter(field):
+        if isinstance(field, serializers.IntegerField):
+            return int
+        text_fields = (serializers.CharField, serializers.RelatedField)
+        if isinstance(field, text_fields):
+            # Значение из values() уже в нужном виде.
+            return None
+        return field.to_representation
+
+    @cached_property
+    def columns(self):
+        columns = []
+        for name, field in self.serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if name in self.prepared:
+                columns.append((name, name, None))
+            else:
+                columns.append((
+                    name,
+                    self.sources.get(name, name),
+                    self.get_converter(field),
+                ))
+        return columns
+
+    def get_columns(self, fields=None):
+        """Колонки ответа; ``fields`` - выбранные через ?fields= и ?omit=."""
+        if fields is None:
+            return self.columns
+        return [column for column in self.columns if column[0] in fields]
+
+    def values(self, queryset, fields=None):
+        keys = [queryset.model._meta.pk.attname]
+        for name, key, _ in self.get_columns(fields):
+            keys.extend(self.prepared.get(name, (key,)))
+        return queryset.prefetch_related(None).values(*dict.fromkeys(keys))
+
+    def prepare(self, rows, fields):
+        pass
+
+    def to_representation(self, rows, fields=None):
+        rows = list(rows)
+        columns = self.get_columns(fields)
+        self.prepare(rows, {name for name, *_ in columns})
+        return [
+            {
+                name: (
+                    row[key] if convert is None or row[key] is None
+                    else convert(row[key])
+                )
+                for name, key, convert in columns
+            }
+            for row in rows
+        ]
+
+
+class TitleRows(ValuesRows):
+    serializer_class = TitleReadSerializer
+    prepared = {
+        'category': ('category_id', 'category__name', 'category__slug'),
+        'genre': (),
+    }
+
+    def prepare(self, rows, fields):
+        if 'genre' in fields:
+            self.prepare_genres(rows)
+        if 'category' in fields:
+            for row in rows:
+                row['category'] = None
+                if row['category_id'] is not None:
+                    row['category'] = {
+                        'name': row['category__name'],
+                        'slug': row['category__slug'],
+                    }
+
+    def prepare_genres(self, rows):
+        genres = defaultdict(list)
+        links = Title.genre.through.objects.filter(
+            title_id__in=[row['id'] for row in rows]
+        ).order_by('genre__name').values_list(
+            'title_id', 'genre__name', 'genre__slug'
+        )
+        for title_id, name, slug in links:
+            genres[title_id].append({'name': name, 'slug': slug})
+        for row in rows:
+            row['genre'] = genres[row['id']]
+
+
+class ReviewRows(ValuesRows):
+    serializer_class = ReviewSerializer
+    sources = {'title': 'title__name', 'author': 'author__username'}
+
+
+class CommentRows(ValuesRows):
+    serializer_class = CommentSerializer
+    sources = {'review': 'review__text', 'author': 'author__username'}
@@ -1,16 +1,54 @@
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
-from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 from reviews.models import Category, Comment, Genre, Review, Title
 from reviews.validators import year_validator
 from users.models import User
 
+from api_yamdb.performance import measure
 
-class UserSerialiser(serializers.ModelSerializer):
+from .fields import CachedSlugRelatedField
+from .sparse import get_requested_fields
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    """ListSerializer, время которого попадает в Server-Timing."""
+
+    @property
+    def data(self):
+        with measure('serialize'):
+            return super().data
+
+
+class SparseFieldsMixin:
+    """Убирает из ответа поля, не выбранные через ?fields= и ?omit=.
+
+    Применяется только к сериализатору верхнего уровня: вложенные
+    сериализаторы создаются без context и отдаются целиком. Время
+    построения ответа попадает в Server-Timing; для списков то же делает
+    ``Meta.list_serializer_class = TimedListSerializer``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = get_requested_fields(
+            self.context.get('request'), self.fields
+        )
+        if selected is not None:
+            for name in set(self.fields) - selected:
+                self.fields.pop(name)
+
+    @property
+    def data(self):
+        with measure('serialize'):
+            return super().data
+
+
+class UserSerialiser(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериалайзер для модели user"""
     class Meta:
+        list_serializer_class = TimedListSerializer
         fields = (
             'username',
             'email',
@@ -22,7 +60,7 @@ class UserSerialiser(serializers.ModelSerializer):
         model = User
 
 
-class SelfEditSerializer(serializers.ModelSerializer):
+class SelfEditSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """"Сериалайзер для модели user, в случае редактирования
     пользователем своих данных"""
     class Meta:
@@ -86,19 +124,21 @@ class GetTokenSerializer(serializers.Serializer):
     )
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
+        list_serializer_class = TimedListSerializer
         model = Category
         fields = ['name', 'slug']
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
+        list_serializer_class = TimedListSerializer
         model = Genre
         fields = ['name', 'slug']
 
 
-class TitleReadSerializer(serializers.ModelSerializer):
+class TitleReadSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для просмотра произведений."""
     category = CategorySerializer(many=False, read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
@@ -106,8 +146,17 @@ class TitleReadSerializer(serializers.ModelSerializer):
     rating = serializers.IntegerField(read_only=True)
 
     class Meta:
+        list_serializer_class = TimedListSerializer
         model = Title
-        fields = '__all__'
+        fields = (
+            'id',
+            'name',
+            'year',
+            'rating',
+            'description',
+            'genre',
+            'category',
+        )
         read_only_fields = (
             'id',
             'name',
@@ -119,11 +168,13 @@ class TitleReadSerializer(serializers.ModelSerializer):
 
 class TitleWriteSerializer(serializers.ModelSerializer):
     """Сериализатор для изменения произведений."""
-    genre = serializers.SlugRelatedField(
+    genre = CachedSlugRelatedField(
+        cache_namespace='genres',
         slug_field='slug',
         many=True,
         queryset=Genre.objects.all())
-    category = serializers.SlugRelatedField(
+    category = CachedSlugRelatedField(
+        cache_namespace='categories',
         slug_field='slug',
         queryset=Category.objects.all(),)
     year = serializers.IntegerField(
@@ -132,10 +183,17 @@ class TitleWriteSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = (
+            'id',
+            'name',
+            'year',
+            'description',
+            'genre',
+            'category',
+        )
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериалайзер для отзывов. Валидирует оценку и уникальность."""
     title = serializers.SlugRelatedField(
         slug_field='name',
@@ -155,24 +213,22 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         request = self.context['request']
-        author = request.user
-        title_id = self.context.get('view').kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        if (
-            request.method == 'POST'
-            and Review.objects.filter(title=title, author=author).exists()
-        ):
+        if request.method != 'POST':
+            return data
+        title = self.context['view'].get_title()
+        if Review.objects.filter(title=title, author=request.user).exists():
             raise ValidationError(
                 'Больше одного отзыва на произведение писать нельзя'
             )
         return data
 
     class Meta:
+        list_serializer_class = TimedListSerializer
         model = Review
         fields = '__all__'
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериалайзер для комментариев."""
     review = serializers.SlugRelatedField(
         slug_field='text',
@@ -184,5 +240,6 @@ class CommentSerializer(serializers.ModelSerializer):
     )
 
     class Meta:
+        list_serializer_class = TimedListSerializer
         fields = '__all__'
         model = Comment
@@ -0,0 +1,73 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import Category, Genre, Review, Title
+from users.models import User
+
+from .authentication import mark_user_changed
+from .cache import bump_versions
+
+
+def bump_after_commit(*names):
+    """Увеличивает версии кеша сейчас и ещё раз после фиксации транзакции.
+
+    Пока транзакция не зафиксирована, параллельный запрос может прочитать
+    прежние строки и сохранить их под уже увеличенной версией; повторное
+    увеличение после COMMIT делает такую запись недоступной.
+    """
+    if transaction.get_connection().in_atomic_block:
+        bump_versions(*names)
+    transaction.on_commit(partial(bump_versions, *names))
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_title(sender, instance, **kwargs):
+    bump_after_commit('titles-list', f'titles-{instance.pk}')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genre(sender, instance, **kwargs):
+    # Жанры вложены в ответы произведений.
+    bump_after_commit('genres', 'titles')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category(sender, instance, **kwargs):
+    bump_after_commit('categories', 'titles')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_related_title(sender, instance, **kwargs):
+    bump_after_commit('titles-list', f'titles-{instance.title_id}')
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bump_after_commit('titles-list', f'titles-{instance.pk}')
+    elif pk_set:
+        bump_after_commit(
+            'titles-list', *(f'titles-{pk}' for pk in sorted(pk_set))
+        )
+    else:
+        bump_after_commit('titles')
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_claims(sender, instance, created, **kwargs):
+    if not created and instance.access_changed:
+        mark_user_changed(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_user_claims(sender, instance, **kwargs):
+    mark_user_changed(instance.pk)
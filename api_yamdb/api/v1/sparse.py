@@ -0,0 +1,26 @@
+"""Разреженные наборы полей: ``?fields=id,name`` и ``?omit=description``.
+
+Действуют только на чтение (GET, HEAD). Неизвестные имена полей
+игнорируются.
+"""
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def parse_names(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def get_requested_fields(request, names):
+    """Поля из ``names``, которые нужно отдать; None - все поля."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    params = request.query_params
+    if FIELDS_PARAM not in params and OMIT_PARAM not in params:
+        return None
+    selected = set(names)
+    if params.get(FIELDS_PARAM):
+        selected &= parse_names(params[FIELDS_PARAM])
+    return selected - parse_names(params.get(OMIT_PARAM, ''))
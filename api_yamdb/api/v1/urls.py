@@ -1,9 +1,11 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
 
+from .async_views import async_read_urls
 from .views import (CategoryViewSet, CommentViewSet, CreateUserViewSet,
-                    GenreViewSet, GetTokenViewSet, ReviewViewSet, TitleViewSet,
-                    UserViewSet)
+                    ExportView, GenreViewSet, GetTokenViewSet, ReviewViewSet,
+                    TitleViewSet, UserViewSet)
 
 router = routers.DefaultRouter()
 router.register('users', UserViewSet)
@@ -34,7 +36,12 @@ auth = [
     ),
 ]
 
+router_urls = router.urls
+if settings.ASYNC_READ_VIEWS:
+    router_urls = async_read_urls(router_urls)
+
 urlpatterns = [
-    path('', include(router.urls)),
+    path('', include(router_urls)),
     path('auth/', include(auth)),
+    path('export/<str:name>/', ExportView.as_view(), name='export'),
 ]
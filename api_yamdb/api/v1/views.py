@@ -1,22 +1,40 @@
+from types import GeneratorType
+
+from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import router
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, permissions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Genre, Review, Title
+from rest_framework.views import APIView
+from reviews.datasets import (DATASETS, EXPORT_FORMATS, export_lines,
+                              export_rows, parse_since)
+from reviews.deletion import delete_title, delete_user
+from reviews.models import (Category, Comment, Genre, Review, SimilarTitle,
+                            Title, TitleRank)
 from users.models import User
+from users.outbox import enqueue_mail
 
-from api_yamdb.settings import DEFAULT_FROM_EMAIL
-
-from .filters import TitleFilter
-from .mixins import CreateListDestroyMixinSet
+from .authentication import get_token_for_user
+from .bulk import TitleBulkWriter
+from .cache import bump_versions
+from .facets import facets_requested, title_facets
+from .filters import NullsLastOrderingFilter, TitleFilter, TrigramSearchFilter
+from .mixins import (CachedReadMixin, CreateListDestroyMixinSet,
+                     CursorPaginationMixin, FastListMixin, SparseQuerysetMixin)
+from .pagination import (CommentCursorPagination, EstimatedCountPagination,
+                         ReviewCursorPagination)
+from .parsers import NDJSONParser
 from .permissions import (AdministratorEdit, IsAdminOrModeratirOrAuthor,
                           IsAdminOrReadOnly)
+from .renderers import FirstRendererNegotiation
+from .rows import CommentRows, ReviewRows, TitleRows
 from .serializers import (CategorySerializer, CommentSerializer,
                           CreateUserSerializer, GenreSerializer,
                           GetTokenSerializer, ReviewSerializer,
@@ -24,16 +42,27 @@ from .serializers import (CategorySerializer, CommentSerializer,
                           TitleWriteSerializer, UserSerialiser)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     """Вьюсет для модели user. Эндпойнт /users/* """
     queryset = User.objects.all()
     serializer_class = UserSerialiser
-    filter_backends = (filters.SearchFilter,)
+    sparse_fields = {
+        name: (name,) for name in UserSerialiser.Meta.fields
+    }
+    filter_backends = (TrigramSearchFilter,)
     search_fields = ('username',)
     permission_classes = (AdministratorEdit,)
     lookup_field = 'username'
     http_method_names = ['get', 'post', 'patch', 'delete']
 
+    def perform_destroy(self, instance):
+        title_ids = delete_user(instance)
+        if title_ids:
+            # Отзывы удалены без сигналов: рейтинг в ответах изменился.
+            bump_versions(
+                'titles-list', *(f'titles-{pk}' for pk in title_ids)
+            )
+
     @action(
         methods=['get', 'patch'],
         detail=False,
@@ -41,7 +70,10 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=[permissions.IsAuthenticated],
     )
     def me(self, request):
-        user = request.user
+        # Пользователь из токена содержит только claims, нужна вся строка.
+        user = get_object_or_404(
+            self.narrow_queryset(User.objects.all()), pk=request.user.pk
+        )
         if request.method == "GET":
             serializer = self.get_serializer(user)
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -78,12 +110,10 @@ class CreateUserViewSet(mixins.CreateModelMixin,
             user = User.objects.create(**serializer.validated_data)
             response_data = serializer.data
         confirmation_code = default_token_generator.make_token(user)
-        send_mail(
+        enqueue_mail(
             subject='Код подтверждения',
             message=f'Ваш код подтверждения: {confirmation_code}',
-            from_email=DEFAULT_FROM_EMAIL,
-            recipient_list=(user.email,),
-            fail_silently=False,
+            recipient=user.email,
         )
         return Response(response_data, status=status.HTTP_200_OK)
 
@@ -107,71 +137,310 @@ class GetTokenViewSet(mixins.CreateModelMixin,
         ) is False:
             message = {'confirmation_code': 'Неверный код подтверждения'}
             return Response(message, status=status.HTTP_400_BAD_REQUEST)
-        message = {'token': str(AccessToken.for_user(user))}
+        message = {'token': str(get_token_for_user(user))}
         return Response(message, status=status.HTTP_200_OK)
 
 
-class GenreViewSet(CreateListDestroyMixinSet):
+class GenreViewSet(CachedReadMixin, SparseQuerysetMixin,
+                   CreateListDestroyMixinSet):
+    cache_namespace = 'genres'
+    sparse_fields = {'name': ('name',), 'slug': ('slug',)}
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = [IsAdminOrReadOnly]
-    pagination_class = PageNumberPagination
+    pagination_class = EstimatedCountPagination
     search_fields = ('name',)
-    filter_backends = [filters.SearchFilter]
+    filter_backends = [TrigramSearchFilter]
     lookup_field = 'slug'
 
 
-class CategoryViewSet(CreateListDestroyMixinSet):
+class CategoryViewSet(CachedReadMixin, SparseQuerysetMixin,
+                      CreateListDestroyMixinSet):
+    cache_namespace = 'categories'
+    sparse_fields = {'name': ('name',), 'slug': ('slug',)}
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAdminOrReadOnly]
-    pagination_class = PageNumberPagination
+    pagination_class = EstimatedCountPagination
     search_fields = ('name',)
     lookup_field = "slug"
-    filter_backends = [filters.SearchFilter]
+    filter_backends = [TrigramSearchFilter]
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')).order_by('id')
+class TitleViewSet(CachedReadMixin, FastListMixin, viewsets.ModelViewSet):
+    cache_namespace = 'titles'
+    list_rows = TitleRows()
+    genre_prefetch = Prefetch(
+        'genre', queryset=Genre.objects.only('name', 'slug')
+    )
+    queryset = Title.objects.select_related('category').prefetch_related(
+        genre_prefetch
+    ).order_by('id')
+    sparse_fields = {
+        'id': (),
+        'name': ('name',),
+        'year': ('year',),
+        'rating': ('rating',),
+        'description': ('description',),
+        'genre': (),
+        'category': ('category__name', 'category__slug'),
+    }
+    sparse_related = {'category': ('category',)}
+    sparse_prefetch = {'genre': (genre_prefetch,)}
     permission_classes = [IsAdminOrReadOnly]
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, NullsLastOrderingFilter)
     filterset_class = TitleFilter
+    ordering_fields = ('rating', 'year', 'name')
+    nulls_last_fields = ('rating',)
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return TitleReadSerializer
         return TitleWriteSerializer
 
+    def perform_destroy(self, instance):
+        delete_title(instance)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if facets_requested(self.request):
+            # Ответ со счётчиками кешируется вместе со страницей списка.
+            response.data['facets'] = title_facets(
+                self.filter_queryset(self.get_queryset())
+            )
+        return response
+
+    @action(detail=False)
+    def top(self, request):
+        """Лучшие произведения по взвешенному рейтингу (reviews.ranking).
+
+        ``?genre=<slug>`` или ``?category=<slug>`` - места внутри жанра
+        или категории, ``?limit=`` - число мест.
+        """
+        return self.cached_response(self.top_response, request)
+
+    def top_response(self, request):
+        params = request.query_params
+        ranks = TitleRank.objects.filter(votes__gt=0)
+        if 'genre' in params and 'category' in params:
+            raise ValidationError(
+                {'detail': 'Укажите только genre или только category.'}
+            )
+        if 'genre' in params:
+            ranks = ranks.filter(genre__slug=params['genre'], category=None)
+        elif 'category' in params:
+            ranks = ranks.filter(genre=None, category__slug=params['category'])
+        else:
+            ranks = ranks.filter(genre=None, category=None)
+        scores = dict(ranks.order_by('-score', 'title_id').values_list(
+            'title_id', 'score'
+        )[:self.get_top_limit()])
+        return Response(self.scored_rows(scores, 'weighted_rating'))
+
+    def scored_rows(self, scores, key):
+        """Строки произведений ``{id: оценка}`` по убыванию оценки.
+
+        Оценка добавляется в строку под именем ``key``.
+        """
+        fields = self.get_requested_fields()
+        rows = sorted(
+            self.list_rows.values(
+                Title.objects.filter(pk__in=scores), fields
+            ),
+            key=lambda row: (-scores[row['id']], row['id']),
+        )
+        data = self.list_rows.to_representation(rows, fields)
+        for row, title_id in zip(data, (row['id'] for row in rows)):
+            row[key] = scores[title_id]
+        return data
+
+    def get_top_limit(self):
+        limit = self.request.query_params.get('limit')
+        if limit is None:
+            return settings.TITLES_TOP_LIMIT
+        if not limit.isdigit() or not int(limit):
+            raise ValidationError(
+                {'limit': 'Ожидается целое положительное число.'}
+            )
+        return min(int(limit), settings.TITLES_TOP_MAX_LIMIT)
+
+    @action(detail=True)
+    def similar(self, request, pk=None):
+        """Похожие произведения (reviews.similarity), по убыванию сходства.
+
+        Соседи пересчитываются командой build_similar_titles.
+        """
+        return self.cached_response(self.similar_response, request)
+
+    def similar_response(self, request):
+        title_id = self.kwargs['pk']
+        if not title_id.isdigit():
+            raise NotFound()
+        scores = dict(
+            SimilarTitle.objects.filter(title_id=title_id)
+            .order_by('-score', 'similar_id')
+            .values_list('similar_id', 'score')
+        )
+        if not scores and not Title.objects.filter(pk=title_id).exists():
+            raise NotFound()
+        return Response(self.scored_rows(scores, 'similarity'))
+
+    @action(
+        methods=['post'],
+        detail=False,
+        permission_classes=[AdministratorEdit],
+        parser_classes=[JSONParser, NDJSONParser],
+    )
+    def bulk(self, request):
+        """Массовое создание и изменение: JSON-массив или NDJSON.
+
+        Элементы с ``id`` обновляются, без ``id`` - создаются.
+        ``?mode=partial`` сохраняет корректные элементы, по умолчанию
+        (``mode=atomic``) любая ошибка отменяет весь запрос.
+        """
+        items = request.data
+        # JSON - список, NDJSON - генератор строк (NDJSONParser).
+        if not isinstance(items, (list, GeneratorType)):
+            return Response(
+                {'detail': 'Ожидается массив произведений.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        writer = TitleBulkWriter(
+            self.get_serializer_context(),
+            atomic=request.query_params.get('mode', 'atomic') != 'partial',
+        )
+        results = writer.run(items)
+        return Response(
+            {
+                'written': writer.written,
+                'failed': writer.failed,
+                'results': results,
+            },
+            status=writer.status_code,
+        )
+
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(CursorPaginationMixin, FastListMixin,
+                    viewsets.ModelViewSet):
     permission_classes = [IsAdminOrModeratirOrAuthor]
-    pagination_class = PageNumberPagination
+    pagination_class = EstimatedCountPagination
+    cursor_pagination_class = ReviewCursorPagination
     filter_backends = [filters.SearchFilter]
     serializer_class = ReviewSerializer
+    list_rows = ReviewRows()
+    sparse_fields = {
+        'id': (),
+        'title': ('title__name',),
+        'author': ('author__username',),
+        'text': ('text',),
+        'score': ('score',),
+        'pub_date': ('pub_date',),
+    }
+    sparse_related = {'title': ('title',), 'author': ('author',)}
+
+    def get_title(self):
+        """Произведение из URL, загружается не больше одного раза за запрос.
+
+        Используется и вьюсетом, и сериализатором (через context['view']).
+        """
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title, pk=self.kwargs.get('title_id')
+            )
+        return self._title
 
-    def title_query(self):
-        return get_object_or_404(Title, id=self.kwargs.get('title_id'))
+    def get_parent(self):
+        return self.get_title()
 
     def get_queryset(self):
-        return Review.objects.filter(title=self.title_query().id)
+        return Review.objects.filter(
+            title_id=self.kwargs.get('title_id')
+        ).select_related('author', 'title')
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not page:
+            # Пустая страница: проверяем, что родительский объект существует.
+            self.get_parent()
+        return page
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.title_query())
+        serializer.save(author=self.request.user, title=self.get_title())
 
 
 class CommentViewSet(ReviewViewSet):
     serializer_class = CommentSerializer
+    list_rows = CommentRows()
+    sparse_fields = {
+        'id': (),
+        'review': ('review__text',),
+        'author': ('author__username',),
+        'text': ('text',),
+        'pub_date': ('pub_date',),
+    }
+    sparse_related = {'review': ('review',), 'author': ('author',)}
+    cursor_pagination_class = CommentCursorPagination
 
-    def review_query(self):
-        return get_object_or_404(
-            Review.objects.filter(title_id=self.kwargs.get('title_id')),
-            pk=self.kwargs.get('review_id')
-        )
+    def get_review(self):
+        """Отзыв из URL с проверкой произведения, не больше одного запроса."""
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review,
+                pk=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id'),
+            )
+        return self._review
+
+    def get_parent(self):
+        return self.get_review()
 
     def get_queryset(self):
-        review = get_object_or_404(Review, pk=self.kwargs.get("review_id"))
-        return review.comments.all()
+        return Comment.objects.filter(
+            review_id=self.kwargs.get('review_id'),
+            review__title_id=self.kwargs.get('title_id'),
+        ).select_related('author', 'review')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.review_query())
+        serializer.save(author=self.request.user, review=self.get_review())
+
+
+class ExportView(APIView):
+    """Потоковая выгрузка набора данных для администратора.
+
+    ``/export/<набор>/?format=csv|ndjson&since=<id или дата>``; наборы и
+    колонки те же, что у ``upload_db``. Строки читаются курсором на стороне
+    сервера и отдаются по мере чтения.
+    """
+    permission_classes = (AdministratorEdit,)
+    content_negotiation_class = FirstRendererNegotiation
+    content_types = {
+        'csv': 'text/csv; charset=utf-8',
+        'ndjson': 'application/x-ndjson; charset=utf-8',
+    }
+
+    def get(self, request, name):
+        if name not in DATASETS:
+            raise NotFound(f'Неизвестный набор данных: {name}.')
+        fmt = request.query_params.get('format', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            raise ValidationError({'format': [
+                f'Допустимые форматы: {", ".join(EXPORT_FORMATS)}.'
+            ]})
+        try:
+            since = parse_since(request.query_params.get('since'))
+        except ValueError as error:
+            raise ValidationError({'since': [str(error)]})
+        model, _, columns = DATASETS[name]
+        # Строки читаются уже после выхода из middleware, поэтому база
+        # выбирается сейчас.
+        rows = export_rows(
+            model, columns, since, using=router.db_for_read(model)
+        )
+        response = StreamingHttpResponse(
+            export_lines(fmt, columns, rows),
+            content_type=self.content_types[fmt],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{name}.{fmt}"'
+        )
+        return response
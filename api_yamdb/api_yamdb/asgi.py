@@ -1,7 +1,14 @@
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+
+from .handlers import StreamingASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+# Чтение каталога, отзывов и комментариев - асинхронными view.
+os.environ.setdefault('ASYNC_READ_VIEWS', '1')
 
-application = get_asgi_application()
+# То же, что django.core.asgi.get_asgi_application(), но потоковые ответы
+# (выгрузка /export/) читаются не в цикле событий.
+django.setup(set_prefix=False)
+application = StreamingASGIHandler()
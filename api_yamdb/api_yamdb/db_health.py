@@ -0,0 +1,54 @@
+"""Проверка постоянных подключений к базе перед запросом.
+
+В Django 3.2 нет CONN_HEALTH_CHECKS: подключение, закрытое сервером или
+pgbouncer за время простоя, обнаруживается только ошибкой запроса.
+ConnectionHealthMiddleware проверяет открытое подключение (``SELECT 1``
+через ``is_usable()``), если оно простаивало дольше
+DB_HEALTH_CHECK_IDLE_SECONDS, и закрывает неработающее - Django откроет
+новое при первом обращении.
+"""
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from .middleware import HybridMiddleware
+
+
+def check_connections():
+    """Закрывает неработающие подключения текущего потока."""
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is None:
+            continue
+        idle_since = getattr(connection, 'idle_since', None)
+        if (
+            idle_since is not None
+            and now - idle_since < settings.DB_HEALTH_CHECK_IDLE_SECONDS
+        ):
+            continue
+        if not connection.in_atomic_block and not connection.is_usable():
+            connection.close()
+
+
+def mark_connections_idle():
+    finished = time.monotonic()
+    for connection in connections.all():
+        connection.idle_since = finished
+
+
+class ConnectionHealthMiddleware(HybridMiddleware):
+    """Проверяет подключения потока, в котором обрабатывается запрос.
+
+    Под ASGI у middleware нет своих подключений: потоки чтения проверяют
+    их сами (``api.v1.async_views``).
+    """
+
+    @contextmanager
+    def around(self, request, result):
+        check_connections()
+        try:
+            yield
+        finally:
+            mark_connections_idle()
@@ -0,0 +1,94 @@
+"""Маршрутизация чтения на реплику.
+
+ReplicaRoutingMiddleware разрешает реплику только для безопасных запросов
+к /api/v1/ и только если клиент недавно ничего не записывал: после записи
+его запросы DB_REPLICA_STICKY_SECONDS секунд идут на основную базу,
+чтобы он сразу видел свои изменения.
+
+Отметка о записи хранится в кеше DB_REPLICA_CACHE_ALIAS по ключу клиента
+(токен, сессия или адрес). Для API-клиентов без cookie это работает,
+только если кеш общий для всех воркеров (см. api.v1.checks).
+"""
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .middleware import HybridMiddleware
+
+REPLICA_DB_ALIAS = 'replica'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+STICKY_COOKIE = 'db_primary'
+STICKY_PREFIX = 'db:sticky:'
+
+use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if (
+            use_replica.get()
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+def sticky_key(request):
+    """Ключ клиента: токен, сессия или адрес."""
+    client = (
+        request.META.get('HTTP_AUTHORIZATION')
+        or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        or request.META.get('REMOTE_ADDR', '')
+    )
+    return STICKY_PREFIX + hashlib.md5(client.encode()).hexdigest()
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+
+    def allow_replica(self, request):
+        if (
+            not replica_configured()
+            or request.method not in SAFE_METHODS
+            or not request.path.startswith(settings.DB_REPLICA_PATH_PREFIX)
+            or STICKY_COOKIE in request.COOKIES
+        ):
+            return False
+        return not caches[settings.DB_REPLICA_CACHE_ALIAS].get(
+            sticky_key(request)
+        )
+
+    @contextmanager
+    def around(self, request, result):
+        token = use_replica.set(self.allow_replica(request))
+        try:
+            yield
+        finally:
+            use_replica.reset(token)
+        response = result.response
+        if (
+            replica_configured()
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            seconds = settings.DB_REPLICA_STICKY_SECONDS
+            caches[settings.DB_REPLICA_CACHE_ALIAS].set(
+                sticky_key(request), True, seconds
+            )
+            response.set_cookie(
+                STICKY_COOKIE, '1', max_age=seconds, httponly=True
+            )
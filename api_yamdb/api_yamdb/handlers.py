@@ -0,0 +1,68 @@
+"""ASGI-обработчик, который не читает потоковые ответы в цикле событий.
+
+Django 3.2 перебирает StreamingHttpResponse прямо в цикле событий:
+генератор, читающий базу (выгрузка ``/export/``), падает с
+SynchronousOnlyOperation, а медленное чтение остановило бы все запросы
+процесса. Здесь части потокового ответа берутся через ``sync_to_async``
+в отдельном потоке ответа: курсор на стороне сервера всё время остаётся
+на одном подключении, цикл событий не блокируется. Подключения потока
+закрываются, когда ответ отправлен или клиент отключился.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connections
+
+
+class StreamingASGIHandler(ASGIHandler):
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            await super().send_response(response, send)
+            return
+        executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='yamdb-stream'
+        )
+        in_thread = partial(
+            sync_to_async, thread_sensitive=False, executor=executor
+        )
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': response.status_code,
+                'headers': self.response_headers(response),
+            })
+            parts = iter(response)
+            while True:
+                part = await in_thread(next)(parts, None)
+                if part is None:
+                    break
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+            await send({'type': 'http.response.body'})
+        finally:
+            await in_thread(connections.close_all)()
+            executor.shutdown(wait=False)
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+    @staticmethod
+    def response_headers(response):
+        """Заголовки и cookie ответа, как в ``ASGIHandler.send_response``."""
+        headers = [
+            (
+                header.encode('ascii') if isinstance(header, str) else header,
+                value.encode('latin1') if isinstance(value, str) else value,
+            )
+            for header, value in response.items()
+        ]
+        headers.extend(
+            (b'Set-Cookie', c.output(header='').encode('ascii').strip())
+            for c in response.cookies.values()
+        )
+        return [(bytes(header), bytes(value)) for header, value in headers]
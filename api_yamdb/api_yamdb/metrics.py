@@ -0,0 +1,110 @@
+"""Метрики Prometheus для /metrics.
+
+Под gunicorn с несколькими воркерами метрики каждого процесса пишутся в
+файлы каталога PROMETHEUS_MULTIPROC_DIR (его готовит ``gunicorn.conf.py``),
+а /metrics собирает их все через MultiProcessCollector. Без этой
+переменной (runserver, тесты) используется обычный реестр процесса.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from django.http import HttpResponse
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+
+from .middleware import HybridMiddleware, wrap_queries
+
+PATH_PREFIX = '/api/v1/'
+
+REQUESTS = Counter(
+    'yamdb_http_requests_total',
+    'Запросы к API по маршруту, методу и статусу.',
+    ['route', 'method', 'status'],
+)
+LATENCY = Histogram(
+    'yamdb_http_request_duration_seconds',
+    'Время обработки запроса к API.',
+    ['route', 'method'],
+    buckets=(
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+        float('inf'),
+    ),
+)
+DB_QUERIES = Histogram(
+    'yamdb_http_request_db_queries',
+    'Число SQL-запросов на запрос к API.',
+    ['route', 'method'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float('inf')),
+)
+CACHE_REQUESTS = Counter(
+    'yamdb_catalog_cache_requests_total',
+    'Обращения к кешу каталога: hit, miss или not_modified (304).',
+    ['namespace', 'result'],
+)
+WORKERS = Gauge(
+    'yamdb_workers',
+    'Число живых процессов-воркеров.',
+    multiprocess_mode='livesum',
+)
+WORKER_STARTED = Gauge(
+    'yamdb_worker_start_time_seconds',
+    'Время запуска воркера (метка pid в режиме нескольких процессов).',
+    multiprocess_mode='liveall',
+)
+
+
+def mark_worker_started():
+    # Под gunicorn вызывается из post_fork (gunicorn.conf.py).
+    WORKERS.set(1)
+    WORKER_STARTED.set(time.time())
+
+
+mark_worker_started()
+
+
+def get_registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """Считает запросы к /api/v1/: число, время и число SQL-запросов.
+
+    Маршрут - имя URL (``api:titles-list``), а не путь, чтобы число
+    рядов не росло с числом объектов.
+    """
+
+    @contextmanager
+    def around(self, request, result):
+        if not request.path.startswith(PATH_PREFIX):
+            yield
+            return
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with wrap_queries(count):
+            yield
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        route = match.view_name if match else 'unmatched'
+        status = result.response.status_code
+        REQUESTS.labels(route, request.method, status).inc()
+        LATENCY.labels(route, request.method).observe(duration)
+        DB_QUERIES.labels(route, request.method).observe(queries)
@@ -0,0 +1,94 @@
+"""Основа middleware проекта для WSGI и ASGI.
+
+Синхронная middleware в асинхронной цепочке (под uvicorn) переводит
+каждый запрос в поток, поэтому middleware проекта умеют работать в обоих
+режимах: HybridMiddleware вызывает ``around()`` и вокруг синхронного, и
+вокруг асинхронного ``get_response``.
+
+Под ASGI SQL-запросы выполняются не в потоке middleware, а в потоках
+``sync_to_async``, у которых свои подключения к базе. Поэтому обёртки
+SQL-запросов (счётчики метрик и замеров) ставятся через ``wrap_queries()``:
+они хранятся в ContextVar, который ``sync_to_async`` копирует в поток,
+а на каждом подключении стоит диспетчер, вызывающий обёртки текущего
+контекста.
+"""
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from types import SimpleNamespace
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+query_wrappers = ContextVar('query_wrappers', default=())
+
+
+def dispatch_queries(execute, sql, params, many, context):
+    for wrapper in reversed(query_wrappers.get()):
+        execute = partial(wrapper, execute)
+    return execute(sql, params, many, context)
+
+
+def install_dispatcher(connection):
+    if dispatch_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(dispatch_queries)
+
+
+def on_connection_created(sender, connection, **kwargs):
+    install_dispatcher(connection)
+
+
+connection_created.connect(on_connection_created)
+
+
+@contextmanager
+def wrap_queries(wrapper):
+    """Оборачивает SQL-запросы текущего запроса в любом потоке.
+
+    ``wrapper`` - функция в формате ``connection.execute_wrapper``.
+    """
+    # Подключения, открытые до импорта модуля (например, в тестах).
+    for connection in connections.all():
+        install_dispatcher(connection)
+    token = query_wrappers.set(query_wrappers.get() + (wrapper,))
+    try:
+        yield
+    finally:
+        query_wrappers.reset(token)
+
+
+class HybridMiddleware:
+    """Middleware, работающая без смены потока и под WSGI, и под ASGI.
+
+    Подкласс реализует ``around(request, result)`` - контекстный менеджер
+    вокруг обработки запроса. После блока ответ лежит в ``result.response``,
+    менеджер может изменить его или заменить.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Так Django узнаёт асинхронную middleware (как MiddlewareMixin).
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        result = SimpleNamespace(response=None)
+        with self.around(request, result):
+            result.response = self.get_response(request)
+        return result.response
+
+    async def __acall__(self, request):
+        result = SimpleNamespace(response=None)
+        with self.around(request, result):
+            result.response = await self.get_response(request)
+        return result.response
+
+    def around(self, request, result):
+        raise NotImplementedError
@@ -0,0 +1,124 @@
+"""Замеры времени обработки запроса.
+
+PerformanceMiddleware считает SQL-запросы и их время (через
+``wrap_queries()``, в том числе в потоках ``sync_to_async``), время
+сериализации и рендеринга (их отмечает ``measure()`` в коде API) и полное
+время запроса.
+Результат уходит в заголовок ``Server-Timing`` и в строку лога
+``api_yamdb.performance`` в формате JSON.
+
+Замеры ведутся для каждого запроса (запись SQL - добавление в список),
+а заголовок и строка лога отдаются для доли запросов PERF_SAMPLE_RATE.
+Запрос дольше PERF_SLOW_REQUEST_MS записывается как предупреждение вместе
+с текстом своих SQL-запросов, попал он в выборку или нет.
+"""
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from .middleware import HybridMiddleware, wrap_queries
+
+logger = logging.getLogger(__name__)
+
+current = ContextVar('request_timings', default=None)
+
+# Разделы Server-Timing, кроме SQL и полного времени.
+SECTIONS = ('serialize', 'render')
+# Сколько самых долгих SQL-запросов записывать для медленного запроса.
+SLOW_SQL_LIMIT = 20
+
+
+class RequestTimings:
+
+    def __init__(self):
+        self.sections = dict.fromkeys(SECTIONS, 0.0)
+        self.queries = []
+        self.sql_time = 0.0
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.sql_time += duration
+            self.queries.append((duration, sql))
+
+
+@contextmanager
+def measure(section):
+    """Добавляет время блока к разделу текущего запроса."""
+    timings = current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.sections[section] += time.perf_counter() - started
+
+
+def server_timing(timings, total):
+    parts = [
+        f'db;dur={timings.sql_time * 1000:.1f};'
+        f'desc="{len(timings.queries)} queries"'
+    ]
+    parts.extend(
+        f'{name};dur={seconds * 1000:.1f}'
+        for name, seconds in timings.sections.items()
+    )
+    parts.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(parts)
+
+
+class PerformanceMiddleware(HybridMiddleware):
+
+    @contextmanager
+    def around(self, request, result):
+        started = time.perf_counter()
+        sampled = random.random() < settings.PERF_SAMPLE_RATE
+        timings = RequestTimings()
+        token = current.set(timings)
+        try:
+            with wrap_queries(timings.execute):
+                yield
+        finally:
+            current.reset(token)
+        response = result.response
+        total = time.perf_counter() - started
+        if sampled:
+            response['Server-Timing'] = server_timing(timings, total)
+            record = self.build_record(request, response, total, timings)
+            logger.info(json.dumps(record, ensure_ascii=False))
+        if total * 1000 >= settings.PERF_SLOW_REQUEST_MS:
+            self.log_slow(request, response, total, timings)
+
+    def build_record(self, request, response, total, timings):
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 1),
+        }
+        record['queries'] = len(timings.queries)
+        record['db_ms'] = round(timings.sql_time * 1000, 1)
+        for name, seconds in timings.sections.items():
+            record[f'{name}_ms'] = round(seconds * 1000, 1)
+        return record
+
+    def log_slow(self, request, response, total, timings):
+        record = self.build_record(request, response, total, timings)
+        record['slow'] = True
+        record['sql'] = [
+            {'ms': round(duration * 1000, 1), 'sql': sql}
+            for duration, sql in sorted(
+                timings.queries, key=lambda query: query[0], reverse=True
+            )[:SLOW_SQL_LIMIT]
+        ]
+        logger.warning(json.dumps(record, ensure_ascii=False))
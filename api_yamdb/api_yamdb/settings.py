@@ -20,6 +20,19 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 DEFAULT_FROM_EMAIL = 'noreply@mydomain.com'
 
+# Очередь исходящей почты, см. команду send_queued_mail.
+MAIL_QUEUE_BATCH_SIZE = int(os.getenv('MAIL_QUEUE_BATCH_SIZE', default=100))
+
+MAIL_QUEUE_MAX_ATTEMPTS = int(os.getenv('MAIL_QUEUE_MAX_ATTEMPTS', default=5))
+
+MAIL_QUEUE_RETRY_DELAY = int(os.getenv('MAIL_QUEUE_RETRY_DELAY', default=60))
+
+# На сколько секунд обработчик забирает пачку: если он упал, не дойдя до
+# результата, письма снова отправляются после этого срока.
+MAIL_QUEUE_LEASE_SECONDS = int(
+    os.getenv('MAIL_QUEUE_LEASE_SECONDS', default=300)
+)
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -29,6 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'django_filters',
     'users.apps.UsersConfig',
@@ -37,11 +51,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api_yamdb.db_health.ConnectionHealthMiddleware',
+    'api_yamdb.metrics.MetricsMiddleware',
+    'api_yamdb.performance.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api_yamdb.db_router.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -77,10 +95,114 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default="postgres"),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default="postgres"),
         'HOST': os.getenv('DB_HOST', default="db"),
-        'PORT': os.getenv('DB_PORT', default=5432)
+        'PORT': os.getenv('DB_PORT', default=5432),
+        # Постоянные подключения: секунды жизни, 0 - подключение на запрос.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        # За pgbouncer в режиме pool_mode=transaction именованные курсоры
+        # не работают: iterator() и выгрузки читают пачками по id.
+        'DISABLE_SERVER_SIDE_CURSORS': (
+            os.getenv('DB_PGBOUNCER', default='') == '1'
+        ),
     }
 }
 
+# Подключение, простоявшее дольше стольких секунд, проверяется перед
+# запросом (api_yamdb.db_health); 0 - проверять перед каждым запросом.
+DB_HEALTH_CHECK_IDLE_SECONDS = float(
+    os.getenv('DB_HEALTH_CHECK_IDLE_SECONDS', default=10)
+)
+
+# Асинхронное чтение под ASGI (api.v1.async_views): asgi.py включает его
+# по умолчанию. Запросы к базе идут в пуле из ASYNC_DB_THREADS потоков -
+# это и предел числа подключений к базе на процесс.
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', default='') == '1'
+
+ASYNC_DB_THREADS = int(os.getenv('ASYNC_DB_THREADS', default=8))
+
+# Реплика для чтения. Для проверки на SQLite достаточно двух файлов:
+# DB_NAME=/tmp/primary.sqlite3 DB_REPLICA_NAME=/tmp/replica.sqlite3.
+if os.getenv('DB_REPLICA_HOST') or os.getenv('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'HOST': os.getenv('DB_REPLICA_HOST', DATABASES['default']['HOST']),
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['api_yamdb.db_router.ReplicaRouter']
+
+DB_REPLICA_PATH_PREFIX = '/api/v1/'
+
+DB_REPLICA_CACHE_ALIAS = 'default'
+
+# Сколько секунд после записи клиент читает с основной базы.
+DB_REPLICA_STICKY_SECONDS = int(
+    os.getenv('DB_REPLICA_STICKY_SECONDS', default=10)
+)
+
+
+# Замеры запросов (api_yamdb.performance): доля запросов с Server-Timing
+# и строкой лога и порог медленного запроса в миллисекундах (медленные
+# пишутся с SQL всегда).
+PERF_SAMPLE_RATE = float(os.getenv('PERF_SAMPLE_RATE', default=0.1))
+
+PERF_SLOW_REQUEST_MS = float(os.getenv('PERF_SLOW_REQUEST_MS', default=1000))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api_yamdb.performance': {
+            'handlers': ['console'],
+            'level': os.getenv('PERF_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+# Cache
+# Для Redis: CACHE_BACKEND=django_redis.cache.RedisCache,
+# CACHE_LOCATION=redis://redis:6379/1 (нужен пакет django-redis).
+
+# В продакшене кеш должен быть общим для процессов (memcached, см.
+# infra/docker-compose.yaml и api.v1.checks). LocMemCache - только для
+# разработки и тестов.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
+    }
+}
+
+# Кеш ответов каталога: /titles/, /genres/, /categories/.
+CATALOG_CACHE_ALIAS = 'default'
+
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', default=300))
+
+# /api/v1/titles/top/ (reviews.ranking): сколько условных оценок средней
+# величины добавляется каждому произведению, число мест по умолчанию и
+# наибольшее.
+TITLES_TOP_PRIOR_VOTES = int(os.getenv('TITLES_TOP_PRIOR_VOTES', default=10))
+
+TITLES_TOP_LIMIT = 10
+
+TITLES_TOP_MAX_LIMIT = 100
+
+# Длина интервала лет в фасетах списка произведений (?facets=true).
+TITLES_FACET_YEAR_BUCKET = int(
+    os.getenv('TITLES_FACET_YEAR_BUCKET', default=10)
+)
+
+# Размер пачки для POST /api/v1/titles/bulk/.
+TITLES_BULK_BATCH_SIZE = int(os.getenv('TITLES_BULK_BATCH_SIZE', default=500))
+
 
 # Password validation
 
@@ -126,17 +248,46 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.v1.authentication.ClaimsJWTAuthentication",
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.'
-                                'PageNumberPagination',
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.v1.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'api.v1.pagination.'
+                                'EstimatedCountPagination',
     "PAGE_SIZE": 10,
 }
 
+# EstimatedCountPagination: выборки, которые по оценке планировщика
+# меньше порога, считаются точным COUNT; число строк кешируется ненадолго,
+# размер таблицы из pg_class - дольше.
+PAGINATION_EXACT_COUNT_THRESHOLD = int(
+    os.getenv('PAGINATION_EXACT_COUNT_THRESHOLD', default=10000)
+)
+
+PAGINATION_COUNT_CACHE_ALIAS = 'default'
+
+PAGINATION_COUNT_CACHE_TIMEOUT = int(
+    os.getenv('PAGINATION_COUNT_CACHE_TIMEOUT', default=5)
+)
+
+PAGINATION_TABLE_SIZE_CACHE_TIMEOUT = int(
+    os.getenv('PAGINATION_TABLE_SIZE_CACHE_TIMEOUT', default=300)
+)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
+
+# Отметки об изменении пользователей для ClaimsJWTAuthentication.
+# Хранятся не дольше времени жизни токена: более старые токены истекли.
+AUTH_CLAIMS_CACHE_ALIAS = 'default'
+
+AUTH_CLAIMS_CHANGE_TTL = int(
+    SIMPLE_JWT["ACCESS_TOKEN_LIFETIME"].total_seconds()
+)
@@ -0,0 +1,78 @@
+"""Настройки gunicorn (читаются из текущего каталога автоматически).
+
+Профиль для продакшена: воркеры gthread (потоки делят процесс и держат
+по постоянному подключению к базе, см. DB_CONN_MAX_AGE) и preload_app
+(приложение загружается один раз до fork). Размеры задаются переменными
+окружения GUNICORN_*.
+"""
+import multiprocessing
+import os
+import shutil
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = 'gthread'
+workers = int(
+    os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1)
+)
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+# Перезапуск воркеров ограничивает рост памяти; разброс - чтобы они
+# не перезапускались одновременно.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 500))
+
+# Метрики воркеров собираются в общий каталог, см. api_yamdb/metrics.py.
+prometheus_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', '/tmp/yamdb-prometheus'
+)
+
+
+def check_shared_cache(server):
+    """Не даёт запустить несколько воркеров с кешем в памяти процесса
+    (см. api.v1.checks)."""
+    if server.cfg.workers < 2:
+        return
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    from api.v1.checks import check_shared_caches
+
+    problems = check_shared_caches(None)
+    if problems:
+        raise RuntimeError(
+            'Несколько воркеров gunicorn требуют общего кеша '
+            '(CACHE_BACKEND): '
+            + ' '.join(problem.msg for problem in problems)
+        )
+
+
+def on_starting(server):
+    check_shared_cache(server)
+    # Файлы прошлого запуска исказили бы счётчики.
+    shutil.rmtree(prometheus_dir, ignore_errors=True)
+    os.makedirs(prometheus_dir)
+
+
+def when_ready(server):
+    # С preload_app метрики импортированы в мастере: он не воркер.
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(os.getpid())
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        # Приложение загрузится уже в воркере.
+        return
+    from django.db import connections
+
+    from api_yamdb.metrics import mark_worker_started
+
+    # Подключения, открытые мастером при загрузке, воркеру не принадлежат.
+    for connection in connections.all():
+        connection.close()
+    mark_worker_started()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,88 @@
+import random
+import statistics
+import time
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from reviews.models import Title
+from reviews.search import rank_by_similarity
+
+SYLLABLES = (
+    'ка', 'ро', 'ми', 'на', 'то', 'ле', 'су', 'ви', 'да', 'зо',
+    'ber', 'lin', 'mor', 'tal', 'gen', 'sun', 'dor', 'vel', 'kin', 'ash',
+)
+
+
+def random_name(rng):
+    return ' '.join(
+        ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        for _ in range(rng.randint(1, 3))
+    ).capitalize()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск по названию произведения: полный просмотр '
+        'таблицы (ILIKE) и GIN-индекс pg_trgm с ранжированием. '
+        'Данные создаются во временной транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1_000_000)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--terms', nargs='+', default=['рока', 'mortal', 'sunvel', 'ми']
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        with transaction.atomic():
+            self.seed(rng, options['titles'], options['batch_size'])
+            for term in options['terms']:
+                self.report(term, options['repeat'])
+            transaction.set_rollback(True)
+
+    def seed(self, rng, count, batch_size):
+        started = time.monotonic()
+        for offset in range(0, count, batch_size):
+            Title.objects.bulk_create(
+                Title(name=random_name(rng), year=1900 + rng.randint(0, 120))
+                for _ in range(min(batch_size, count - offset))
+            )
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE reviews_title')
+        print(
+            f'>>> Создано произведений - {count} '
+            f'за {time.monotonic() - started:.1f} с'
+        )
+
+    def measure(self, queryset, repeat, indexes):
+        timings = []
+        for _ in range(repeat):
+            with transaction.atomic():
+                if connection.vendor == 'postgresql' and not indexes:
+                    with connection.cursor() as cursor:
+                        cursor.execute('SET LOCAL enable_bitmapscan = off')
+                        cursor.execute('SET LOCAL enable_indexscan = off')
+                # Как в API: COUNT для пагинации и первая страница.
+                started = time.perf_counter()
+                found = queryset.count()
+                list(queryset.values_list('id', flat=True)[:10])
+                timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), found
+
+    def report(self, term, repeat):
+        plain = Title.objects.filter(name__icontains=term).order_by('id')
+        ranked = rank_by_similarity(plain, ('name',), term)
+        plain_ms, found = self.measure(plain, repeat, indexes=False)
+        print(f'>>> "{term}": полный просмотр - {plain_ms:.1f} мс ({found})')
+        if connection.vendor != 'postgresql':
+            print('    pg_trgm недоступен, сравнение только на PostgreSQL')
+            return
+        ranked_ms, found = self.measure(ranked, repeat, indexes=True)
+        print(
+            f'    pg_trgm + ранжирование - {ranked_ms:.1f} мс ({found}), '
+            f'ускорение x{plain_ms / ranked_ms:.1f}'
+        )
@@ -0,0 +1,59 @@
+from api.v1.cache import bump_versions
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+
+try:
+    from reviews import similarity
+except ImportError:  # NumPy и SciPy нужны только этой команде.
+    similarity = None
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает похожие произведения /api/v1/titles/{id}/similar/ '
+        'по общим жанрам и пользователям, высоко оценившим оба произведения'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-k', type=int, default=10,
+            help='Число соседей произведения.',
+        )
+        parser.add_argument(
+            '--min-score', type=int, default=8,
+            help='Оценка, начиная с которой отзыв считается высоким.',
+        )
+        parser.add_argument(
+            '--genre-weight', type=float, default=0.5,
+            help='Вес жанров в сходстве (0..1), остальное - общие оценки.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int,
+            default=getattr(similarity, 'DEFAULT_CHUNK_SIZE', None),
+            help=(
+                'Произведений в блоке матрицы сходства; блок занимает около '
+                'chunk-size * число произведений * 12 байт.'
+            ),
+        )
+        parser.add_argument(
+            '--read-chunk-size', type=int,
+            default=getattr(similarity, 'DEFAULT_READ_CHUNK_SIZE', None),
+            help='Строк таблиц в пачке при чтении.',
+        )
+
+    def handle(self, *args, **options):
+        if similarity is None:
+            raise CommandError('Для пересчёта нужны numpy и scipy.')
+        if not 0 <= options['genre_weight'] <= 1:
+            raise CommandError('--genre-weight должен быть от 0 до 1.')
+        with transaction.atomic():
+            rows = similarity.build_similar_titles(
+                k=options['k'],
+                min_score=options['min_score'],
+                genre_weight=options['genre_weight'],
+                chunk_size=options['chunk_size'],
+                read_chunk_size=options['read_chunk_size'],
+            )
+        # Ответы /similar/ кешируются с версией списка произведений.
+        bump_versions('titles-list')
+        print(f'>>> Пересчитаны похожие произведения, пар - {rows}')
@@ -0,0 +1,73 @@
+import os
+import time
+
+from django.core.management import BaseCommand, CommandError
+from reviews.datasets import (DATASETS, DEFAULT_CHUNK_SIZE, EXPORT_FORMATS,
+                              MODEL_CSV, export_lines, export_rows,
+                              parse_since)
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает данные в csv (в формате upload_db) или NDJSON. '
+        'Строки читаются курсором на стороне сервера пачками '
+        '--chunk-size и сразу пишутся в файл.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='.', help='Каталог для файлов')
+        parser.add_argument(
+            '--format', choices=EXPORT_FORMATS, default='csv',
+        )
+        parser.add_argument(
+            '--since',
+            help=(
+                'Только записи с id больше числа или с pub_date позже даты; '
+                'таблицы без pub_date при выгрузке по дате выгружаются '
+                'целиком'
+            ),
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help='Количество строк, получаемых из базы за раз',
+        )
+        parser.add_argument(
+            '--datasets', nargs='+', choices=list(DATASETS),
+            help='Выгрузить только эти наборы',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть больше нуля')
+        try:
+            since = parse_since(options['since'])
+        except ValueError as error:
+            raise CommandError(str(error))
+        fmt = options['format']
+        os.makedirs(options['path'], exist_ok=True)
+        selected = options['datasets'] or list(DATASETS)
+        for model, csv_f, columns in MODEL_CSV:
+            name = os.path.splitext(csv_f)[0]
+            if name not in selected:
+                continue
+            filename = csv_f if fmt == 'csv' else f'{name}.{fmt}'
+            started = time.monotonic()
+            rows = export_rows(
+                model, columns, since, chunk_size=options['chunk_size']
+            )
+            dumped = 0
+            with open(
+                os.path.join(options['path'], filename), 'w',
+                encoding='utf-8', newline='',
+            ) as out:
+                for line in export_lines(fmt, columns, rows):
+                    out.write(line)
+                    dumped += 1
+            if fmt == 'csv':
+                dumped -= 1  # строка заголовка
+            elapsed = time.monotonic() - started
+            speed = dumped / elapsed if elapsed else dumped
+            print(
+                f'>>> Выгружен файл - {filename}: {dumped} строк, '
+                f'{speed:.0f} строк/с'
+            )
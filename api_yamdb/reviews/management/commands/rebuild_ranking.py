@@ -0,0 +1,30 @@
+from api.v1.cache import bump_versions
+from django.core.management import BaseCommand
+from django.db import transaction
+from reviews.ranking import rebuild_ranking
+from reviews.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинг /api/v1/titles/top/ (общий, по жанрам и '
+        'категориям) по взвешенной оценке произведений'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--with-ratings',
+            action='store_true',
+            help='Сначала пересчитать суммы оценок по таблице отзывов.',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['with_ratings']:
+                updated = rebuild_ratings()
+                print(f'>>> Пересчитан рейтинг произведений - {updated}')
+            rows = rebuild_ranking()
+        # /titles/top/ кешируется вместе со списками произведений, рейтинг
+        # виден и в карточках.
+        bump_versions('titles' if options['with_ratings'] else 'titles-list')
+        print(f'>>> Пересчитан рейтинг лучших произведений, мест - {rows}')
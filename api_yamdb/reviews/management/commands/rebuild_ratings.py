@@ -0,0 +1,15 @@
+from api.v1.cache import bump_versions
+from django.core.management import BaseCommand
+from django.db import transaction
+from reviews.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённый рейтинг произведений по отзывам'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = rebuild_ratings()
+        # Рейтинг виден в списках и карточках произведений.
+        bump_versions('titles')
+        print(f'>>> Пересчитан рейтинг произведений - {updated}')
@@ -1,89 +1,225 @@
 import csv
 import os
+import time
+from contextlib import nullcontext
+from itertools import islice
 
+from api.v1.cache import bump_versions
 from django.conf import settings
-from django.core.management import BaseCommand
-from reviews.models import Category, Comment, Genre, Review, Title
-from users.models import User
-
-
-def add_category(row):
-    Category.objects.get_or_create(
-        id=row[0],
-        name=row[1],
-        slug=row[2],
-    )
-
-
-def add_genre(row):
-    Genre.objects.get_or_create(
-        id=row[0],
-        name=row[1],
-        slug=row[2],
-    )
-
-
-def add_titles(row):
-    Title.objects.get_or_create(
-        id=row[0],
-        name=row[1],
-        year=row[2],
-        category_id=row[3],
-    )
-
-
-def add_users(row):
-    User.objects.get_or_create(
-        id=row[0],
-        username=row[1],
-        email=row[2],
-        role=row[3],
-        bio=row[4],
-        first_name=row[5],
-        last_name=row[6],
-    )
-
-
-def add_review(row):
-    Review.objects.get_or_create(
-        id=row[0],
-        title_id=row[1],
-        text=row[2],
-        author_id=row[3],
-        score=row[4],
-        pub_date=row[5]
-    )
-
-
-def add_comment(row):
-    Comment.objects.get_or_create(
-        id=row[0],
-        review_id=row[1],
-        text=row[2],
-        author_id=row[3],
-        pub_date=row[4],
-    )
-
-
-MODEL_CSV = {
-    add_category: 'category.csv',
-    add_genre: 'genre.csv',
-    add_titles: 'titles.csv',
-    add_users: 'users.csv',
-    add_review: 'review.csv',
-    add_comment: 'comments.csv',
-}
+from django.core.management import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from reviews.datasets import MODEL_CSV
+from reviews.ranking import rebuild_ranking
+from reviews.ratings import rebuild_ratings
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def read_batches(reader, batch_size):
+    while True:
+        batch = list(islice(reader, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def insert_rows(model, objs, ignore_conflicts=False):
+    """Вставляет объекты со значениями полей как есть и возвращает число
+    добавленных строк.
+
+    Вставка выполняется в режиме raw, как в loaddata: auto_now_add не
+    подменяет pub_date из csv текущим временем, а поле модели не
+    меняется. С ``ignore_conflicts`` уже существующие строки пропускаются
+    и не попадают в результат.
+    """
+    if not objs:
+        return 0
+    manager = model._base_manager
+    fields = model._meta.concrete_fields
+    for field in fields:
+        if getattr(field, 'auto_now_add', False):
+            # Колонки нет в csv - значение задаётся явно.
+            for obj in objs:
+                if getattr(obj, field.attname) is None:
+                    setattr(obj, field.attname, timezone.now())
+    pks = [obj.pk for obj in objs]
+    before = manager.filter(pk__in=pks).count() if ignore_conflicts else 0
+    batch_size = connection.ops.bulk_batch_size(fields, objs) or len(objs)
+    for start in range(0, len(objs), batch_size):
+        manager._insert(
+            objs[start:start + batch_size],
+            fields=fields,
+            raw=True,
+            ignore_conflicts=ignore_conflicts,
+        )
+    if not ignore_conflicts:
+        return len(objs)
+    return manager.filter(pk__in=pks).count() - before
 
 
 class Command(BaseCommand):
+    help = 'Загружает данные из csv файлов в базу'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=os.path.join(settings.BASE_DIR, 'static', 'data'),
+            help='Каталог с csv файлами',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество строк в одной пачке INSERT',
+        )
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument(
+            '--truncate',
+            action='store_true',
+            help='Очистить таблицы перед загрузкой',
+        )
+        mode.add_argument(
+            '--upsert',
+            action='store_true',
+            help='Обновлять существующие записи вместо пропуска',
+        )
 
     def handle(self, *args, **options):
-        for model, csv_f in MODEL_CSV.items():
-            path = os.path.join(settings.BASE_DIR, 'static', 'data', csv_f)
-            with open(path, 'r', encoding='utf-8') as csv_file:
-                reader = csv.reader(csv_file)
-                next(reader)
-
-                for row in reader:
-                    model(row)
-            print(f'>>> Загружен файл - {csv_f}')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        self.verbosity = options['verbosity']
+        # С --truncate очистка и загрузка - одна транзакция: если файл не
+        # загрузился, таблицы не остаются пустыми.
+        with transaction.atomic() if options['truncate'] else nullcontext():
+            if options['truncate']:
+                self.truncate()
+            for model, csv_f, columns in MODEL_CSV:
+                path = os.path.join(options['path'], csv_f)
+                if not os.path.exists(path):
+                    print(f'>>> Пропущен файл - {csv_f}: не найден')
+                    continue
+                self.load(model, path, columns, options)
+            self.reset_sequences()
+            # Отзывы загружаются без сигналов, поэтому рейтинг и места
+            # /titles/top/ считаем заново.
+            with transaction.atomic():
+                rebuild_ratings()
+                rebuild_ranking()
+        # Записи без сигналов: кеш каталога и таблицы slug'ов сбрасываются
+        # явно.
+        bump_versions('titles', 'genres', 'categories')
+        print('>>> Пересчитан рейтинг произведений')
+
+    def load(self, model, path, columns, options):
+        started = time.monotonic()
+        with transaction.atomic():
+            if options['truncate'] and self.can_copy(model, columns):
+                loaded = self.copy_file(model, path, columns)
+            else:
+                loaded = self.load_file(
+                    model, path, columns,
+                    options['batch_size'], options['upsert'],
+                )
+        elapsed = time.monotonic() - started
+        speed = loaded / elapsed if elapsed else loaded
+        print(
+            f'>>> Загружен файл - {os.path.basename(path)}: {loaded} строк, '
+            f'{speed:.0f} строк/с'
+        )
+
+    def truncate(self):
+        models = [model for model, _, _ in reversed(MODEL_CSV)]
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                tables = ', '.join(
+                    connection.ops.quote_name(model._meta.db_table)
+                    for model in models
+                )
+                with connection.cursor() as cursor:
+                    cursor.execute(f'TRUNCATE {tables} CASCADE')
+            else:
+                for model in models:
+                    model.objects.all().delete()
+
+    def load_file(self, model, path, columns, batch_size, upsert):
+        nullable = {
+            field.attname for field in model._meta.concrete_fields
+            if field.null
+        }
+        loaded = 0
+        with open(path, 'r', encoding='utf-8') as csv_file:
+            reader = csv.reader(csv_file)
+            next(reader)
+            for rows in read_batches(reader, batch_size):
+                objs = [
+                    model(**{
+                        column: (
+                            None if value == '' and column in nullable
+                            else value
+                        )
+                        for column, value in zip(columns, row)
+                    })
+                    for row in rows
+                ]
+                if upsert:
+                    loaded += self.upsert(model, objs, columns, batch_size)
+                else:
+                    loaded += insert_rows(model, objs, ignore_conflicts=True)
+                if self.verbosity >= 2:
+                    print(f'    {os.path.basename(path)}: {loaded} строк')
+        return loaded
+
+    def upsert(self, model, objs, columns, batch_size):
+        existing = set(
+            model.objects.filter(
+                pk__in=[obj.pk for obj in objs]
+            ).values_list('pk', flat=True)
+        )
+        pk_type = model._meta.pk.to_python
+        to_update = [obj for obj in objs if pk_type(obj.pk) in existing]
+        to_create = [obj for obj in objs if pk_type(obj.pk) not in existing]
+        update_fields = [
+            model._meta.get_field(column).name
+            for column in columns if column != 'id'
+        ]
+        if to_update:
+            model.objects.bulk_update(
+                to_update, update_fields, batch_size=batch_size
+            )
+        return len(to_update) + insert_rows(model, to_create)
+
+    def can_copy(self, model, columns):
+        """COPY не заполняет значения по умолчанию из моделей Django,
+        поэтому подходит только если остальные колонки допускают NULL."""
+        if connection.vendor != 'postgresql':
+            return False
+        return all(
+            field.null or field.attname in columns
+            for field in model._meta.concrete_fields
+        )
+
+    def copy_file(self, model, path, columns):
+        table = connection.ops.quote_name(model._meta.db_table)
+        db_columns = ', '.join(
+            connection.ops.quote_name(model._meta.get_field(column).column)
+            for column in columns
+        )
+        with open(path, 'r', encoding='utf-8') as csv_file:
+            with connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f'COPY {table} ({db_columns}) '
+                    'FROM STDIN WITH (FORMAT csv, HEADER true)',
+                    csv_file,
+                )
+                return cursor.rowcount
+
+    def reset_sequences(self):
+        models = [model for model, _, _ in MODEL_CSV]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if not statements:
+            return
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
@@ -0,0 +1,56 @@
+# Generated by Django 3.2 on 2026-10-18 20:18
+
+from django.db import migrations, models
+from django.db.models import Count, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+
+def fill_ratings(apps, schema_editor):
+    # Копия reviews.ratings.rebuild_ratings на момент миграции: миграция
+    # не должна зависеть от кода приложения.
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    rating_sum = Coalesce(
+        Subquery(reviews.annotate(total=Sum('score')).values('total')),
+        0,
+        output_field=models.IntegerField(),
+    )
+    rating_count = Coalesce(
+        Subquery(reviews.annotate(total=Count('pk')).values('total')),
+        0,
+        output_field=models.IntegerField(),
+    )
+    Title.objects.update(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        rating=Cast(rating_sum, FloatField()) / NullIf(rating_count, 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_auto_20230212_1547'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(blank=True, db_index=True, editable=False, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
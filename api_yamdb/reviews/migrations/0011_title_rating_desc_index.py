@@ -0,0 +1,32 @@
+from django.db import migrations
+
+# ?ordering=-rating сортирует по rating DESC NULLS LAST (произведения без
+# оценок в конце). По возрастанию NULLS LAST подходит обычный индекс
+# rating. SQLite не поддерживает NULLS LAST в индексах.
+INDEX = 'title_rating_desc_idx'
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDEX} '
+        f'ON reviews_title (rating DESC NULLS LAST)'
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_similar_title'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2 on 2026-10-18 21:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_title_rating_desc_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingMean',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Средняя оценка')),
+            ],
+            options={
+                'verbose_name': 'Средняя оценка рейтинга',
+                'verbose_name_plural': 'Средняя оценка рейтинга',
+            },
+        ),
+    ]
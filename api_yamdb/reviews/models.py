@@ -1,5 +1,5 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
 from django.db.models import CharField, SlugField
 from users.models import User
 
@@ -72,6 +72,8 @@ class Genre(models.Model):
 
 class Title(models.Model):
     """Произведение."""
+    RATING_FIELDS = ('rating_sum', 'rating_count', 'rating')
+
     name = models.CharField(
         verbose_name='Название',
         max_length=256,
@@ -99,6 +101,23 @@ class Title(models.Model):
         related_name='titles',
         verbose_name='Жанр',
     )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False,
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок',
+        default=0,
+        editable=False,
+    )
+    rating = models.FloatField(
+        verbose_name='Рейтинг',
+        blank=True,
+        null=True,
+        editable=False,
+        db_index=True,
+    )
 
     class Meta:
         verbose_name = 'Произведение'
@@ -108,6 +127,96 @@ class Title(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Рейтинг меняют только UPDATE с F() из сигналов отзывов:
+        # сохранение загруженного раньше экземпляра не затирает отзывы,
+        # записанные после загрузки.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.RATING_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
+class TitleRank(models.Model):
+    """Взвешенный рейтинг произведения в срезе (см. reviews.ranking).
+
+    Общий срез - без жанра и категории, срез жанра - с жанром, срез
+    категории - с категорией.
+    """
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='ranks',
+    )
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.CASCADE,
+        related_name='+',
+        blank=True,
+        null=True,
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='+',
+        blank=True,
+        null=True,
+    )
+    score = models.FloatField(verbose_name='Взвешенный рейтинг')
+    votes = models.PositiveIntegerField(verbose_name='Количество оценок')
+
+    class Meta:
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Рейтинг произведений'
+        indexes = [
+            # Первые места среза: ORDER BY score DESC LIMIT n по индексу.
+            models.Index(
+                fields=['genre', 'category', '-score', 'title'],
+                name='title_rank_slice_idx',
+            ),
+        ]
+
+
+class RankingMean(models.Model):
+    """Средняя оценка C последнего пересчёта рейтинга (см. reviews.ranking).
+
+    Единственная строка: между пересчётами процессы берут C отсюда, а не
+    суммируют оценки всех произведений.
+    """
+    score = models.FloatField(verbose_name='Средняя оценка')
+
+    class Meta:
+        verbose_name = 'Средняя оценка рейтинга'
+        verbose_name_plural = 'Средняя оценка рейтинга'
+
+
+class SimilarTitle(models.Model):
+    """Похожее произведение (см. reviews.similarity)."""
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='neighbours',
+    )
+    similar = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    score = models.FloatField(verbose_name='Сходство')
+
+    class Meta:
+        verbose_name = 'Похожее произведение'
+        verbose_name_plural = 'Похожие произведения'
+        indexes = [
+            # Соседи произведения по убыванию сходства - одно чтение индекса.
+            models.Index(
+                fields=['title', '-score'], name='similar_title_score_idx'
+            ),
+        ]
+
 
 class GenreTitle(models.Model):
     """Произведения-Жанры."""
@@ -139,6 +248,25 @@ class Review(BasicUserContent):
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
         unique_together = ('author', 'title',)
+        indexes = [
+            # Пагинация отзывов произведения по курсору.
+            models.Index(fields=['title', 'id'], name='review_title_id_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            if not self._state.adding:
+                # Сигналу нужна прежняя оценка. Она читается под блокировкой
+                # строки, а не берётся из момента загрузки: параллельное
+                # изменение того же отзыва дождётся этой транзакции и
+                # сдвинет рейтинг от уже сохранённой оценки.
+                self._loaded_score = (
+                    Review.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .values_list('score', flat=True)
+                    .first()
+                )
+            super().save(*args, **kwargs)
 
 
 class Comment(BasicUserContent):
@@ -154,3 +282,9 @@ class Comment(BasicUserContent):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ['id', ]
+        indexes = [
+            # Пагинация комментариев к отзыву по курсору.
+            models.Index(
+                fields=['review', 'id'], name='comment_review_id_idx'
+            ),
+        ]
@@ -0,0 +1,170 @@
+"""Рейтинг произведений для /api/v1/titles/top/.
+
+Произведения упорядочены по байесовскому взвешенному рейтингу
+
+    WR = (rating_sum + m * C) / (rating_count + m),
+
+где C - средняя оценка по всем отзывам, m - TITLES_TOP_PRIOR_VOTES. Пока
+оценок мало, WR близок к C, поэтому одна десятка не выводит произведение
+в лидеры.
+
+Таблица TitleRank хранит по строке на срез: общий, каждый жанр и
+категорию произведения. rebuild_ranking() заполняет её несколькими
+INSERT ... SELECT по сохранённым суммам оценок (см. ``ratings``), между
+пересчётами update_ranks() и add_title_rank() обновляют строки
+произведения после изменения его отзывов. C запоминается при пересчёте
+в RankingMean и кешируется на CATALOG_CACHE_TIMEOUT секунд, поэтому новое
+значение доходит до всех процессов; сдвиг средней оценки из-за новых
+отзывов учитывается следующим пересчётом, как и смена жанров и категории
+произведения.
+"""
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, router, transaction
+from django.db.models import (F, FloatField, IntegerField, OuterRef, Subquery,
+                              Value)
+from django.db.models.aggregates import Sum
+from django.db.models.functions import Cast
+
+from .models import RankingMean, Title, TitleRank
+
+MEAN_SCORE_KEY = 'ranking:mean-score'
+COLUMNS = ('title_id', 'genre_id', 'category_id', 'score', 'votes')
+# Аннотации запросов rank_querysets() в порядке COLUMNS.
+RANK_FIELDS = (
+    'rank_title', 'rank_genre', 'rank_category', 'rank_score', 'rank_votes',
+)
+
+
+def compute_mean_score():
+    """Средняя оценка по всем отзывам, None - отзывов нет."""
+    totals = Title.objects.aggregate(
+        total=Sum('rating_sum'), count=Sum('rating_count')
+    )
+    if not totals['count']:
+        return None
+    return totals['total'] / totals['count']
+
+
+def get_mean_score():
+    """C последнего пересчёта; до первого пересчёта - по всем отзывам."""
+    cache = caches[settings.CATALOG_CACHE_ALIAS]
+    mean = cache.get(MEAN_SCORE_KEY)
+    if mean is None:
+        mean = RankingMean.objects.values_list('score', flat=True).first()
+        if mean is None:
+            mean = compute_mean_score()
+        cache.set(MEAN_SCORE_KEY, mean, settings.CATALOG_CACHE_TIMEOUT)
+    return mean
+
+
+def weighted_rating(mean, prefix=''):
+    prior = settings.TITLES_TOP_PRIOR_VOTES
+    return (
+        Cast(F(f'{prefix}rating_sum'), FloatField()) + prior * mean
+    ) / (F(f'{prefix}rating_count') + prior)
+
+
+def rank_querysets(mean, titles=None):
+    """Запросы строк TitleRank для всех срезов; колонки в порядке COLUMNS."""
+    if titles is None:
+        titles = Title.objects.all()
+    titles = titles.filter(rating_count__gt=0).order_by()
+    none = Value(None, output_field=IntegerField())
+    overall = titles.annotate(
+        rank_title=F('pk'),
+        rank_genre=none,
+        rank_category=none,
+        rank_score=weighted_rating(mean),
+        rank_votes=F('rating_count'),
+    )
+    by_category = titles.filter(category__isnull=False).annotate(
+        rank_title=F('pk'),
+        rank_genre=none,
+        rank_category=F('category_id'),
+        rank_score=weighted_rating(mean),
+        rank_votes=F('rating_count'),
+    )
+    by_genre = Title.genre.through.objects.filter(
+        title__in=titles.values('pk')
+    ).order_by().annotate(
+        rank_title=F('title_id'),
+        rank_genre=F('genre_id'),
+        rank_category=none,
+        rank_score=weighted_rating(mean, 'title__'),
+        rank_votes=F('title__rating_count'),
+    )
+    return [
+        queryset.values(*RANK_FIELDS)
+        for queryset in (overall, by_category, by_genre)
+    ]
+
+
+def insert_ranks(querysets):
+    """Вставляет строки запросов одним INSERT ... SELECT на запрос."""
+    alias = router.db_for_write(TitleRank)
+    connection = connections[alias]
+    quote = connection.ops.quote_name
+    head = 'INSERT INTO {} ({})'.format(
+        quote(TitleRank._meta.db_table),
+        ', '.join(map(quote, COLUMNS)),
+    )
+    inserted = 0
+    with connection.cursor() as cursor:
+        for queryset in querysets:
+            sql, params = queryset.query.get_compiler(alias).as_sql()
+            cursor.execute(f'{head} {sql}', params)
+            inserted += cursor.rowcount
+    return inserted
+
+
+def rebuild_ranking():
+    """Перестраивает TitleRank целиком; возвращает число строк."""
+    mean = compute_mean_score()
+    RankingMean.objects.all().delete()
+    if mean is not None:
+        RankingMean.objects.create(score=mean)
+    remember = partial(
+        caches[settings.CATALOG_CACHE_ALIAS].set,
+        MEAN_SCORE_KEY, mean, settings.CATALOG_CACHE_TIMEOUT,
+    )
+    remember()
+    # До фиксации другой процесс мог закешировать прежнее C из базы.
+    transaction.on_commit(remember)
+    TitleRank.objects.all().delete()
+    if mean is None:
+        return 0
+    return insert_ranks(rank_querysets(mean))
+
+
+def update_ranks(title_ids):
+    """Обновляет взвешенный рейтинг произведений во всех их срезах.
+
+    Возвращает число обновлённых строк.
+    """
+    mean = get_mean_score()
+    if mean is None:
+        return 0
+    title = Title.objects.filter(pk=OuterRef('title_id'))
+    return TitleRank.objects.filter(title_id__in=title_ids).update(
+        score=Subquery(
+            title.annotate(rank_score=weighted_rating(mean))
+            .values('rank_score')[:1]
+        ),
+        votes=Subquery(title.values('rating_count')[:1]),
+    )
+
+
+def add_title_rank(title_id):
+    """Обновляет места произведения после нового отзыва.
+
+    После первого отзыва строк произведения ещё нет - они добавляются.
+    """
+    if not update_ranks([title_id]):
+        mean = get_mean_score()
+        if mean is not None:
+            insert_ranks(
+                rank_querysets(mean, Title.objects.filter(pk=title_id))
+            )
@@ -0,0 +1,54 @@
+from django.db.models import F, FloatField, IntegerField, OuterRef, Subquery
+from django.db.models.aggregates import Count, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from .models import Review, Title
+
+
+def _rating_expression(rating_sum, rating_count):
+    """Среднее значение оценок, NULL при отсутствии отзывов."""
+    return Cast(rating_sum, FloatField()) / NullIf(rating_count, 0)
+
+
+def change_rating(title_id, score_delta, count_delta=0):
+    """Атомарно сдвигает сохранённый рейтинг произведения.
+
+    Обновление выполняется одним UPDATE на уровне БД, поэтому параллельные
+    отзывы на одно произведение не теряют друг друга.
+    """
+    rating_sum = F('rating_sum') + score_delta
+    rating_count = F('rating_count') + count_delta
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        rating=_rating_expression(rating_sum, rating_count),
+    )
+
+
+def rebuild_ratings(titles=None, reviews=None):
+    """Пересчитывает рейтинг по таблице отзывов одним UPDATE.
+
+    Возвращает количество обновлённых произведений.
+    """
+    if titles is None:
+        titles = Title.objects.all()
+    if reviews is None:
+        reviews = Review.objects.all()
+    reviews = reviews.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    rating_sum = Coalesce(
+        Subquery(reviews.annotate(total=Sum('score')).values('total')),
+        0,
+        output_field=IntegerField(),
+    )
+    rating_count = Coalesce(
+        Subquery(reviews.annotate(total=Count('pk')).values('total')),
+        0,
+        output_field=IntegerField(),
+    )
+    return titles.update(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        rating=_rating_expression(rating_sum, rating_count),
+    )
@@ -0,0 +1,22 @@
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
+from django.db.models.functions import Greatest
+
+
+def rank_by_similarity(queryset, fields, value):
+    """Сортирует результаты поиска по триграммному сходству.
+
+    Работает только на PostgreSQL с расширением pg_trgm; на других базах
+    queryset возвращается без изменений (обычный icontains).
+    """
+    if not value or connections[queryset.db].vendor != 'postgresql':
+        return queryset
+    similarities = [TrigramSimilarity(field, value) for field in fields]
+    rank = (
+        Greatest(*similarities) if len(similarities) > 1
+        else similarities[0]
+    )
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    return queryset.annotate(search_rank=rank).order_by(
+        '-search_rank', *ordering
+    )
@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Review, Title
+from .ranking import add_title_rank, update_ranks
+from .ratings import change_rating, rebuild_ratings
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    if created:
+        change_rating(instance.title_id, instance.score, 1)
+        add_title_rank(instance.title_id)
+        return
+    loaded_score = getattr(instance, '_loaded_score', None)
+    if loaded_score is None:
+        # Прежняя оценка неизвестна - пересчитываем произведение целиком.
+        rebuild_ratings(Title.objects.filter(pk=instance.title_id))
+    elif loaded_score != instance.score:
+        change_rating(instance.title_id, instance.score - loaded_score)
+    else:
+        return
+    update_ranks([instance.title_id])
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    change_rating(instance.title_id, -instance.score, -1)
+    update_ranks([instance.title_id])
@@ -0,0 +1,143 @@
+"""Похожие произведения для /api/v1/titles/{id}/similar/.
+
+Каждое произведение описывается разреженным вектором из двух частей:
+жанры (единица на каждый жанр) и пользователи, поставившие ему высокую
+оценку (не ниже ``min_score``). Части нормируются по отдельности и
+складываются с весами ``genre_weight`` и ``1 - genre_weight``, поэтому
+косинус двух векторов - взвешенная сумма косинусов по жанрам и по общим
+поклонникам.
+
+Таблицы читаются пачками в массивы NumPy (от каждой пачки остаются
+только нужные колонки id), матрица сходства считается блоками строк:
+блок ``chunk_size`` x число произведений умножается на всю матрицу, из
+каждой строки берутся k лучших соседей, блок сразу записывается в
+SimilarTitle. Память ограничена блоком и векторами, а не квадратом числа
+произведений: блок float32 и номера столбцов int64 от ``argpartition``
+занимают около ``chunk_size * число произведений * 12`` байт (при
+``chunk_size`` 64 и 100 000 произведений - около 77 МБ).
+
+Модуль нужен только команде build_similar_titles: NumPy и SciPy не
+требуются для работы API.
+"""
+from itertools import islice
+
+import numpy as np
+from scipy import sparse
+
+from .datasets import export_rows
+from .models import Review, SimilarTitle, Title
+
+DEFAULT_CHUNK_SIZE = 64
+DEFAULT_READ_CHUNK_SIZE = 100_000
+
+
+def read_columns(model, columns, chunk_size, where=None, keep=None):
+    """Колонки таблицы массивом int64 (строка на запись), пачками.
+
+    Среди колонок должен быть id. ``where`` получает массив пачки и
+    возвращает маску нужных строк, ``keep`` - номера колонок, которые
+    остаются в результате (по умолчанию все).
+    """
+    if keep is None:
+        keep = range(len(columns))
+    keep = list(keep)
+    rows = export_rows(model, columns, chunk_size=chunk_size)
+    parts = []
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        chunk = np.array(chunk, dtype=np.int64)
+        if where is not None:
+            chunk = chunk[where(chunk)]
+        parts.append(chunk[:, keep])
+    if not parts:
+        return np.empty((0, len(keep)), dtype=np.int64)
+    return np.concatenate(parts)
+
+
+def incidence_matrix(title_ids, pairs):
+    """Матрица произведение x признак по парам (id произведения, id)."""
+    rows = np.searchsorted(title_ids, pairs[:, 0])
+    features, columns = np.unique(pairs[:, 1], return_inverse=True)
+    return sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (rows, columns)),
+        shape=(len(title_ids), len(features)),
+    )
+
+
+def normalize_rows(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags((1 / norms).astype(np.float32)) @ matrix
+
+
+def title_vectors(title_ids, genre_pairs, fan_pairs, genre_weight):
+    """Векторы произведений: взвешенные нормированные жанры и поклонники."""
+    genres = normalize_rows(incidence_matrix(title_ids, genre_pairs))
+    fans = normalize_rows(incidence_matrix(title_ids, fan_pairs))
+    return sparse.hstack([
+        np.float32(np.sqrt(genre_weight)) * genres,
+        np.float32(np.sqrt(1 - genre_weight)) * fans,
+    ], format='csr', dtype=np.float32)
+
+
+def top_neighbours(vectors, k, chunk_size):
+    """k ближайших соседей каждой строки блоками по ``chunk_size``.
+
+    Отдаёт (номер первой строки блока, номера соседей, сходство); соседи
+    строки упорядочены по убыванию сходства, сама строка исключена.
+    """
+    count = vectors.shape[0]
+    k = min(k, count - 1)
+    if k <= 0:
+        return
+    # CSR x CSR в SciPy заметно быстрее, чем CSR x CSC.
+    transposed = vectors.T.tocsr()
+    for start in range(0, count, chunk_size):
+        block = (vectors[start:start + chunk_size] @ transposed).toarray()
+        rows = np.arange(block.shape[0])
+        block[rows, start + rows] = -1
+        # Без копии блока: k лучших - в последних k столбцах разбиения.
+        neighbours = np.argpartition(block, -k, axis=1)[:, -k:]
+        scores = np.take_along_axis(block, neighbours, axis=1)
+        order = np.argsort(-scores, axis=1, kind='stable')
+        yield (
+            start,
+            np.take_along_axis(neighbours, order, axis=1),
+            np.take_along_axis(scores, order, axis=1),
+        )
+
+
+def build_similar_titles(k, min_score, genre_weight,
+                         chunk_size=DEFAULT_CHUNK_SIZE,
+                         read_chunk_size=DEFAULT_READ_CHUNK_SIZE):
+    """Перестраивает SimilarTitle целиком; возвращает число строк.
+
+    Вызывающий код оборачивает пересчёт в транзакцию.
+    """
+    title_ids = read_columns(Title, ('id',), read_chunk_size)[:, 0]
+    genre_pairs = read_columns(
+        Title.genre.through, ('id', 'title_id', 'genre_id'), read_chunk_size,
+        keep=(1, 2),
+    )
+    fan_pairs = read_columns(
+        Review, ('id', 'title_id', 'author_id', 'score'), read_chunk_size,
+        where=lambda chunk: chunk[:, 3] >= min_score, keep=(1, 2),
+    )
+    vectors = title_vectors(title_ids, genre_pairs, fan_pairs, genre_weight)
+    del genre_pairs, fan_pairs
+
+    SimilarTitle.objects.all().delete()
+    written = 0
+    for start, neighbours, scores in top_neighbours(vectors, k, chunk_size):
+        rows, positions = np.nonzero(scores > 0)
+        written += len(SimilarTitle.objects.bulk_create(
+            SimilarTitle(
+                title_id=int(title_ids[start + row]),
+                similar_id=int(title_ids[neighbours[row, position]]),
+                score=float(scores[row, position]),
+            )
+            for row, position in zip(rows, positions)
+        ))
+    return written
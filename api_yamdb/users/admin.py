@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import User
+from .models import OutgoingMail, User
 
 
 @admin.register(User)
@@ -14,3 +14,17 @@ class UserAdmin(admin.ModelAdmin):
         'bio',
         'role'
     )
+
+
+@admin.register(OutgoingMail)
+class OutgoingMailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'recipient',
+        'subject',
+        'created',
+        'send_after',
+        'sent_at',
+        'attempts',
+    )
+    list_filter = ('sent_at',)
@@ -0,0 +1,47 @@
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from users.outbox import send_queued_mail
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди исходящей почты'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.MAIL_QUEUE_BATCH_SIZE,
+            help='Сколько писем отправлять через одно соединение',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=settings.MAIL_QUEUE_MAX_ATTEMPTS,
+            help='После скольких неудачных попыток письмо не отправляется',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, опрашивая очередь',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза между опросами пустой очереди, в секундах',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_queued_mail(
+                options['batch_size'], options['max_attempts']
+            )
+            if sent or failed:
+                print(f'>>> Отправлено писем - {sent}, с ошибкой - {failed}')
+                if sent + failed == options['batch_size']:
+                    continue
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
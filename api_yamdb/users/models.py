@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
 from django.db import models
+from django.utils import timezone
 
 from .validators import validate_username_not_me
 
@@ -53,6 +54,25 @@ class User(AbstractUser):
         default=USER
     )
 
+    # Поля, от которых зависят права доступа (см. ClaimsJWTAuthentication).
+    ACCESS_FIELDS = ('username', 'role', 'is_superuser', 'is_active')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_access = instance.get_access_values()
+        return instance
+
+    def get_access_values(self):
+        return tuple(self.__dict__.get(field) for field in self.ACCESS_FIELDS)
+
+    @property
+    def access_changed(self):
+        return (
+            getattr(self, '_loaded_access', None)
+            != self.get_access_values()
+        )
+
     @property
     def is_moderator(self):
         return self.role == self.MODERATOR
@@ -74,3 +94,58 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.username
+
+
+class OutgoingMail(models.Model):
+    """Письмо в очереди на отправку, см. команду send_queued_mail."""
+    subject = models.CharField(
+        max_length=255,
+        verbose_name='Тема'
+    )
+    message = models.TextField(
+        verbose_name='Текст'
+    )
+    from_email = models.EmailField(
+        max_length=254,
+        verbose_name='Отправитель'
+    )
+    recipient = models.EmailField(
+        max_length=254,
+        verbose_name='Получатель'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создано'
+    )
+    send_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Отправить после'
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Отправлено'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=['send_after'],
+                name='outgoing_mail_pending_idx',
+                condition=models.Q(sent_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
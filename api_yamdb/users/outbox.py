@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingMail
+
+
+def enqueue_mail(subject, message, recipient, from_email=None):
+    """Ставит письмо в очередь вместо отправки в рамках запроса."""
+    return OutgoingMail.objects.create(
+        subject=subject,
+        message=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipient=recipient,
+    )
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед следующей попыткой."""
+    return timedelta(
+        seconds=settings.MAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+def claim_batch(batch_size, max_attempts, now):
+    """Забирает пачку писем в короткой транзакции.
+
+    Строки блокируются с SKIP LOCKED только на время UPDATE: попытка
+    засчитывается, а send_after сдвигается на MAIL_QUEUE_LEASE_SECONDS,
+    поэтому другие обработчики пачку пропускают, а если этот упадёт -
+    письма будут отправлены снова.
+    """
+    with transaction.atomic():
+        batch = list(
+            OutgoingMail.objects.select_for_update(skip_locked=True).filter(
+                sent_at__isnull=True,
+                send_after__lte=now,
+                attempts__lt=max_attempts,
+            ).order_by('id')[:batch_size]
+        )
+        lease = now + timedelta(seconds=settings.MAIL_QUEUE_LEASE_SECONDS)
+        for mail in batch:
+            mail.attempts += 1
+            mail.send_after = lease
+        OutgoingMail.objects.bulk_update(batch, ('attempts', 'send_after'))
+    return batch
+
+
+def send_queued_mail(batch_size, max_attempts):
+    """Отправляет одну пачку писем через одно SMTP-соединение.
+
+    Пачка забирается отдельной транзакцией (claim_batch), сеть работает
+    без блокировок. Если соединение не открылось, неудачной считается
+    вся пачка. Можно запускать несколько обработчиков одновременно.
+    Возвращает (отправлено, с ошибкой).
+    """
+    now = timezone.now()
+    batch = claim_batch(batch_size, max_attempts, now)
+    if not batch:
+        return 0, 0
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for mail in batch:
+            fail(mail, error, now)
+        failed = len(batch)
+    else:
+        try:
+            for mail in batch:
+                try:
+                    connection.send_messages([EmailMessage(
+                        subject=mail.subject,
+                        body=mail.message,
+                        from_email=mail.from_email,
+                        to=(mail.recipient,),
+                    )])
+                except Exception as error:
+                    fail(mail, error, now)
+                    failed += 1
+                else:
+                    mail.sent_at = timezone.now()
+                    mail.last_error = ''
+                    sent += 1
+        finally:
+            connection.close()
+    OutgoingMail.objects.bulk_update(
+        batch, ('sent_at', 'send_after', 'last_error')
+    )
+    return sent, failed
+
+
+def fail(mail, error, now):
+    mail.last_error = str(error)
+    mail.send_after = now + retry_delay(mail.attempts)
@@ -1,9 +1,25 @@
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
+    'tests.fixtures.fixture_user',
+    'tests.fixtures.fixture_data',
+    'tests.fixtures.fixture_perf',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Кеш общий для процесса, а база откатывается после каждого теста."""
+    from api.v1.fields import SLUG_TABLES
+    from django.core.cache import caches
+
+    for cache in caches.all():
+        cache.clear()
+    SLUG_TABLES.clear()
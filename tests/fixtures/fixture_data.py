@@ -0,0 +1,34 @@
+import pytest
+from reviews.models import Category, Genre, Title
+
+
+@pytest.fixture
+def categories():
+    return [
+        Category.objects.create(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def genres():
+    return [
+        Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(5)
+    ]
+
+
+@pytest.fixture
+def make_titles(categories, genres):
+    def make(count):
+        titles = []
+        for i in range(count):
+            title = Title.objects.create(
+                name=f'Произведение {i}',
+                year=2000 + i % 20,
+                category=categories[i % len(categories)],
+            )
+            title.genre.set(genres[:1 + i % len(genres)])
+            titles.append(title)
+        return titles
+    return make
@@ -0,0 +1,127 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+from api.v1.authentication import get_token_for_user
+from rest_framework.test import APIClient
+from reviews.models import (Category, Comment, Genre, Review, SimilarTitle,
+                            Title)
+from reviews.ranking import rebuild_ranking
+from reviews.ratings import rebuild_ratings
+from users.models import User
+
+from ..conftest import root_dir
+
+PERF_SIZE = int(os.getenv('YAMDB_PERF_SIZE', 20))
+PERF_REPEAT = int(os.getenv('YAMDB_PERF_REPEAT', 10))
+PERF_REPORT = os.getenv(
+    'YAMDB_PERF_REPORT', os.path.join(root_dir, 'perf_report.json')
+)
+REVIEWS_PER_TITLE = 5
+COMMENTS_PER_REVIEW = 2
+SIMILAR_PER_TITLE = 3
+
+
+def jwt_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {get_token_for_user(user)}'
+    )
+    return client
+
+
+@pytest.fixture(scope='session')
+def perf_report():
+    """Собирает замеры всех эндпойнтов и пишет их в JSON в конце сессии."""
+    report = {
+        'size': PERF_SIZE,
+        'repeat': PERF_REPEAT,
+        'endpoints': {},
+    }
+    yield report
+    if report['endpoints']:
+        with open(PERF_REPORT, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+@pytest.fixture
+def perf_data(django_user_model):
+    """Набор данных размера YAMDB_PERF_SIZE для замеров."""
+    size = max(PERF_SIZE, REVIEWS_PER_TITLE + PERF_REPEAT)
+    admin = django_user_model.objects.create_user(
+        username='PerfAdmin', email='perfadmin@yamdb.fake', role='admin'
+    )
+    author = django_user_model.objects.create_user(
+        username='PerfAuthor', email='perfauthor@yamdb.fake'
+    )
+    User.objects.bulk_create([
+        User(username=f'perf-user-{i}', email=f'perf-user-{i}@yamdb.fake')
+        for i in range(size)
+    ])
+    users = list(User.objects.filter(username__startswith='perf-user-'))
+    Category.objects.bulk_create([
+        Category(name=f'Категория {i}', slug=f'perf-category-{i}')
+        for i in range(5)
+    ])
+    categories = list(Category.objects.all())
+    Genre.objects.bulk_create([
+        Genre(name=f'Жанр {i}', slug=f'perf-genre-{i}')
+        for i in range(10)
+    ])
+    genres = list(Genre.objects.all())
+    Title.objects.bulk_create([
+        Title(
+            name=f'Произведение {i}',
+            year=1950 + i % 70,
+            description='Описание',
+            category=categories[i % len(categories)],
+        )
+        for i in range(size)
+    ])
+    titles = list(Title.objects.order_by('id'))
+    Title.genre.through.objects.bulk_create([
+        Title.genre.through(title=title, genre=genres[(i + j) % len(genres)])
+        for i, title in enumerate(titles)
+        for j in range(3)
+    ])
+    Review.objects.bulk_create([
+        Review(
+            title=title,
+            author=users[(i + j) % len(users)],
+            text='Отзыв',
+            score=1 + (i + j) % 10,
+        )
+        for i, title in enumerate(titles)
+        for j in range(REVIEWS_PER_TITLE)
+    ])
+    reviews = list(Review.objects.order_by('id'))
+    Comment.objects.bulk_create([
+        Comment(review=review, author=users[j], text='Комментарий')
+        for review in reviews
+        for j in range(COMMENTS_PER_REVIEW)
+    ])
+    # Соседи задаются напрямую: build_similar_titles нужны numpy и scipy.
+    SimilarTitle.objects.bulk_create([
+        SimilarTitle(
+            title=title,
+            similar=titles[(i + j) % len(titles)],
+            score=1 / j,
+        )
+        for i, title in enumerate(titles)
+        for j in range(1, SIMILAR_PER_TITLE + 1)
+    ])
+    rebuild_ratings()
+    rebuild_ranking()
+    return SimpleNamespace(
+        admin=admin,
+        author=author,
+        users=users,
+        categories=categories,
+        genres=genres,
+        titles=titles,
+        reviews=reviews,
+        admin_client=jwt_client(admin),
+        author_client=jwt_client(author),
+        anon_client=APIClient(),
+    )
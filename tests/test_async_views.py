@@ -0,0 +1,110 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from api.v1.async_views import async_read, async_read_urls
+from api.v1.authentication import get_token_for_user
+from api.v1.urls import router
+from api.v1.views import TitleViewSet
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from rest_framework.test import APIRequestFactory
+
+from api_yamdb.handlers import StreamingASGIHandler
+from api_yamdb.middleware import wrap_queries
+from api_yamdb.performance import PerformanceMiddleware
+
+
+def thread_name_view(request):
+    return HttpResponse(threading.current_thread().name)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncRead:
+
+    def call(self, view, method):
+        request = getattr(APIRequestFactory(), method)('/api/v1/titles/')
+        return async_to_sync(async_read(view))(request)
+
+    def test_read_in_pool(self):
+        response = self.call(thread_name_view, 'get')
+        assert response.content.startswith(b'yamdb-db')
+
+    def test_write_stays_in_django_thread(self):
+        response = self.call(thread_name_view, 'post')
+        assert not response.content.startswith(b'yamdb-db')
+
+    def test_queries_wrapped_in_pool(self, make_titles):
+        make_titles(2)
+        threads = []
+
+        def record(execute, sql, params, many, context):
+            threads.append(threading.current_thread().name)
+            return execute(sql, params, many, context)
+
+        with wrap_queries(record):
+            response = self.call(
+                TitleViewSet.as_view({'get': 'list'}), 'get'
+            )
+        assert response.status_code == 200
+        assert response.data['count'] == 2
+        assert threads
+        assert all(name.startswith('yamdb-db') for name in threads)
+
+    def test_only_read_routes_replaced(self):
+        views = {
+            pattern.name: pattern.callback
+            for pattern in async_read_urls(router.urls)
+        }
+        assert asyncio.iscoroutinefunction(views['titles-list'])
+        assert asyncio.iscoroutinefunction(views['comments-list'])
+        assert not asyncio.iscoroutinefunction(views['user-list'])
+        assert not asyncio.iscoroutinefunction(views['genres-list'])
+
+
+def test_middleware_async_mode(settings):
+    settings.PERF_SAMPLE_RATE = 1
+
+    async def get_response(request):
+        return HttpResponse()
+
+    middleware = PerformanceMiddleware(get_response)
+    assert asyncio.iscoroutinefunction(middleware)
+    response = async_to_sync(middleware)(
+        APIRequestFactory().get('/api/v1/titles/')
+    )
+    assert response.has_header('Server-Timing')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_export_streams_under_asgi(admin, make_titles):
+    # Стандартный ASGIHandler Django 3.2 читает выгрузку в цикле событий
+    # и падает с SynchronousOnlyOperation.
+    titles = make_titles(3)
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': '/api/v1/export/titles/',
+        'query_string': b'format=ndjson',
+        'headers': [(
+            b'authorization',
+            f'Bearer {get_token_for_user(admin)}'.encode(),
+        )],
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    async_to_sync(StreamingASGIHandler())(scope, receive, send)
+
+    assert messages[0]['status'] == 200
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    assert [
+        json.loads(line)['id'] for line in body.decode().splitlines()
+    ] == [title.id for title in titles]
+    assert messages[-1] == {'type': 'http.response.body'}
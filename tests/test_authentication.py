@@ -0,0 +1,96 @@
+import importlib.util
+import os
+from types import SimpleNamespace
+
+import pytest
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import caches
+from rest_framework.test import APIClient
+from users.models import User
+
+
+@pytest.mark.django_db
+class TestClaimsAuthentication:
+
+    def get_client(self, user):
+        response = APIClient().post('/api/v1/auth/token/', {
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        })
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}'
+        )
+        return client
+
+    def test_admin_request_without_user_query(self, admin,
+                                              django_assert_num_queries):
+        client = self.get_client(admin)
+        # COUNT и страница пользователей, без загрузки admin.
+        with django_assert_num_queries(2):
+            response = client.get('/api/v1/users/')
+        assert response.status_code == 200
+
+    def test_role_downgrade_applies_to_issued_token(self, admin):
+        client = self.get_client(admin)
+        admin.role = 'user'
+        admin.save()
+        assert client.get('/api/v1/users/').status_code == 403
+
+    def test_profile_edit_keeps_token_stateless(self, user,
+                                                django_assert_num_queries):
+        client = self.get_client(user)
+        assert client.patch(
+            '/api/v1/users/me/', {'bio': 'Новая'}, format='json'
+        ).status_code == 200
+        with django_assert_num_queries(1):
+            response = client.get('/api/v1/users/me/')
+        assert response.json()['bio'] == 'Новая'
+
+    def test_deleted_user_is_rejected(self, user):
+        client = self.get_client(user)
+        user.delete()
+        assert client.get('/api/v1/users/me/').status_code == 401
+
+    def test_other_worker_rechecks_writes(self, admin, make_titles):
+        title = make_titles(1)[0]
+        client = self.get_client(admin)
+        admin.role = 'user'
+        admin.save()
+        # Другой воркер с кешем в памяти процесса не видит отметку об
+        # изменении: чтение ещё доверяет claims, запись проверяется по базе.
+        caches[settings.AUTH_CLAIMS_CACHE_ALIAS].clear()
+        assert client.get('/api/v1/users/').status_code == 200
+        assert client.delete(
+            f'/api/v1/titles/{title.id}/'
+        ).status_code == 403
+
+    def test_update_without_signal_applies_to_writes(self, admin,
+                                                     make_titles):
+        title = make_titles(1)[0]
+        client = self.get_client(admin)
+        User.objects.filter(pk=admin.pk).update(is_active=False)
+        assert client.delete(
+            f'/api/v1/titles/{title.id}/'
+        ).status_code == 401
+
+
+def load_gunicorn_conf():
+    spec = importlib.util.spec_from_file_location(
+        'gunicorn_conf', os.path.join(settings.BASE_DIR, 'gunicorn.conf.py')
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize('workers, fails', [(1, False), (3, True)])
+def test_gunicorn_refuses_process_local_cache(workers, fails):
+    server = SimpleNamespace(cfg=SimpleNamespace(workers=workers))
+    check = load_gunicorn_conf().check_shared_cache
+    if fails:
+        with pytest.raises(RuntimeError):
+            check(server)
+    else:
+        check(server)
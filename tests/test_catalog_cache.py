@@ -0,0 +1,86 @@
+import pytest
+from reviews.models import Genre, Review
+
+
+@pytest.mark.django_db
+class TestCatalogCache:
+    url = '/api/v1/titles/'
+
+    def test_repeated_list_is_cached(self, anon_client, make_titles,
+                                     django_assert_num_queries):
+        make_titles(3)
+        first = anon_client.get(self.url, {'year': '', 'name': 'Про'})
+        with django_assert_num_queries(0):
+            second = anon_client.get(self.url, {'name': 'Про'})
+        assert second.json() == first.json()
+
+    def test_etag_not_modified(self, anon_client, make_titles,
+                               django_assert_num_queries):
+        title = make_titles(1)[0]
+        url = f'{self.url}{title.id}/'
+        etag = anon_client.get(url)['ETag']
+        with django_assert_num_queries(0):
+            response = anon_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert not response.content
+
+    def test_review_invalidates_title(self, anon_client, make_titles, user):
+        title, other = make_titles(2)
+        url = f'{self.url}{title.id}/'
+        other_url = f'{self.url}{other.id}/'
+        etag = anon_client.get(url)['ETag']
+        other_etag = anon_client.get(other_url)['ETag']
+
+        Review.objects.create(title=title, author=user, text='Ок', score=9)
+
+        response = anon_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.json()['rating'] == 9
+        response = anon_client.get(other_url, HTTP_IF_NONE_MATCH=other_etag)
+        assert response.status_code == 304
+
+    def test_genre_rename_invalidates_titles(self, anon_client, make_titles):
+        title = make_titles(1)[0]
+        anon_client.get(self.url)
+        genre = Genre.objects.get(pk=title.genre.first().pk)
+        genre.name = 'Новое имя'
+        genre.save()
+        response = anon_client.get(self.url)
+        assert response.json()['results'][0]['genre'][0]['name'] == (
+            'Новое имя'
+        )
+
+    def test_genre_link_invalidates_title(self, anon_client, make_titles,
+                                          genres):
+        title = make_titles(1)[0]
+        url = f'{self.url}{title.id}/'
+        anon_client.get(url)
+        title.genre.set(genres)
+        assert len(anon_client.get(url).json()['genre']) == len(genres)
+
+    def test_versions_bumped_again_after_commit(
+            self, anon_client, make_titles, user,
+            django_capture_on_commit_callbacks):
+        title = make_titles(1)[0]
+        url = f'{self.url}{title.id}/'
+        with django_capture_on_commit_callbacks() as callbacks:
+            Review.objects.create(title=title, author=user, text='Ок', score=9)
+            # Ответ, закешированный до фиксации транзакции.
+            etag = anon_client.get(url)['ETag']
+        assert anon_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        for callback in callbacks:
+            callback()
+        assert anon_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_shared_cache_check(settings, tmp_path):
+    from api.v1.checks import check_shared_caches
+
+    assert {warning.id for warning in check_shared_caches(None)} == {
+        'api.W001'
+    }
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(tmp_path),
+    }}
+    assert check_shared_caches(None) == []
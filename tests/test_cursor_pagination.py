@@ -0,0 +1,33 @@
+import pytest
+from reviews.models import Review
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+
+    def test_reviews_cursor_pages(self, anon_client, make_titles,
+                                  django_user_model):
+        title = make_titles(1)[0]
+        for i in range(15):
+            author = django_user_model.objects.create(
+                username=f'author-{i}', email=f'author-{i}@yamdb.fake'
+            )
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            )
+        url = f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'
+
+        first = anon_client.get(url).json()
+        assert 'count' not in first
+        assert first['previous'] is None
+        second = anon_client.get(first['next']).json()
+        ids = [item['id'] for item in first['results'] + second['results']]
+
+        assert ids == sorted(ids, reverse=True)
+        assert len(set(ids)) == 15
+        assert second['next'] is None
+
+    def test_page_number_is_default(self, anon_client, make_titles):
+        title = make_titles(1)[0]
+        response = anon_client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert response.json()['count'] == 0
@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+from api_yamdb import db_health
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+
+class FakeConnection(SimpleNamespace):
+
+    def is_usable(self):
+        self.checks += 1
+        return self.usable
+
+    def close(self):
+        self.connection = None
+
+
+class TestConnectionHealth:
+
+    def call(self, monkeypatch, *fakes):
+        monkeypatch.setattr(
+            db_health.connections, 'all', lambda: list(fakes)
+        )
+        middleware = db_health.ConnectionHealthMiddleware(
+            lambda request: HttpResponse()
+        )
+        middleware(RequestFactory().get('/api/v1/titles/'))
+
+    def fake(self, usable=True, idle_since=None):
+        return FakeConnection(
+            connection=object(), in_atomic_block=False, usable=usable,
+            idle_since=idle_since, checks=0,
+        )
+
+    def test_broken_connection_closed(self, monkeypatch):
+        broken = self.fake(usable=False)
+        self.call(monkeypatch, broken)
+        assert broken.connection is None
+
+    def test_recently_used_connection_not_checked(self, monkeypatch,
+                                                  settings):
+        settings.DB_HEALTH_CHECK_IDLE_SECONDS = 60
+        connection = self.fake()
+        self.call(monkeypatch, connection)
+        self.call(monkeypatch, connection)
+        # Проверка только перед первым запросом, затем простой короче порога.
+        assert connection.checks == 1
+        assert connection.connection is not None
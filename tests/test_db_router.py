@@ -0,0 +1,84 @@
+import pytest
+from api.v1.cache import BUMPED_PREFIX, get_cache
+from api_yamdb import db_router
+from django.db import connection, router
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Title
+
+
+class TestReplicaRouting:
+
+    @pytest.fixture(autouse=True)
+    def replica(self, monkeypatch):
+        monkeypatch.setattr(db_router, 'replica_configured', lambda: True)
+
+    def call(self, method, path, status=200, **extra):
+        seen = {}
+
+        def get_response(request):
+            seen['db'] = router.db_for_read(Title)
+            return HttpResponse(status=status)
+
+        request = getattr(RequestFactory(), method)(path, **extra)
+        response = db_router.ReplicaRoutingMiddleware(get_response)(request)
+        return seen['db'], response
+
+    def test_safe_api_read_uses_replica(self):
+        assert self.call('get', '/api/v1/titles/')[0] == 'replica'
+
+    def test_write_and_other_paths_use_primary(self):
+        assert self.call('post', '/api/v1/titles/')[0] == 'default'
+        assert self.call('get', '/admin/')[0] == 'default'
+
+    def test_reads_stick_to_primary_after_write(self):
+        token = {'HTTP_AUTHORIZATION': 'Bearer first'}
+        self.call('patch', '/api/v1/users/me/', **token)
+        assert self.call('get', '/api/v1/users/me/', **token)[0] == 'default'
+        assert self.call(
+            'get', '/api/v1/users/me/', HTTP_AUTHORIZATION='Bearer other'
+        )[0] == 'replica'
+
+    def test_failed_write_does_not_stick(self):
+        token = {'HTTP_AUTHORIZATION': 'Bearer first'}
+        self.call('post', '/api/v1/titles/', status=400, **token)
+        assert self.call('get', '/api/v1/titles/', **token)[0] == 'replica'
+
+    def test_write_sets_sticky_cookie(self, settings):
+        _, response = self.call('post', '/api/v1/titles/', status=201)
+        cookie = response.cookies[db_router.STICKY_COOKIE]
+        assert cookie['max-age'] == settings.DB_REPLICA_STICKY_SECONDS
+
+    def test_sticky_cookie_keeps_primary(self):
+        request_db, _ = self.call(
+            'get', '/api/v1/titles/',
+            HTTP_COOKIE=f'{db_router.STICKY_COOKIE}=1',
+        )
+        assert request_db == 'default'
+
+    def test_read_outside_request_uses_primary(self):
+        assert router.db_for_read(Title) == 'default'
+
+
+@pytest.mark.django_db
+def test_replica_read_not_cached_after_write(monkeypatch, anon_client,
+                                            make_titles):
+    monkeypatch.setattr(db_router, 'replica_configured', lambda: True)
+    make_titles(1)
+    url = '/api/v1/titles/'
+    response = anon_client.get(url)
+    assert response.status_code == 200
+    assert not response.has_header('ETag')
+    with CaptureQueriesContext(connection) as context:
+        anon_client.get(url)
+    assert context.captured_queries
+
+    # Окно отставания реплики прошло.
+    get_cache().delete_many([
+        BUMPED_PREFIX + name for name in ('titles', 'titles-list')
+    ])
+    assert anon_client.get(url).has_header('ETag')
+    with CaptureQueriesContext(connection) as context:
+        anon_client.get(url)
+    assert not context.captured_queries
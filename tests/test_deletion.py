@@ -0,0 +1,75 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Comment, Review, Title
+
+
+@pytest.mark.django_db
+class TestFastDeletion:
+
+    def add_reviews(self, title, authors, comment_author):
+        for i, author in enumerate(authors):
+            review = Review.objects.create(
+                title=title, author=author, text='Отзыв', score=1 + i % 10
+            )
+            Comment.objects.create(
+                review=review, author=comment_author, text='Комментарий'
+            )
+
+    def make_authors(self, django_user_model, count, prefix):
+        return [
+            django_user_model.objects.create(
+                username=f'{prefix}-{i}', email=f'{prefix}-{i}@yamdb.fake'
+            )
+            for i in range(count)
+        ]
+
+    def delete_queries(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            assert client.delete(url).status_code == 204
+        return len(context.captured_queries)
+
+    def test_title_delete_does_not_scale_with_reviews(
+        self, admin_client, make_titles, user, django_user_model
+    ):
+        small, large = make_titles(2)
+        self.add_reviews(
+            small, self.make_authors(django_user_model, 1, 'a'), user
+        )
+        self.add_reviews(
+            large, self.make_authors(django_user_model, 30, 'b'), user
+        )
+
+        small_queries = self.delete_queries(
+            admin_client, f'/api/v1/titles/{small.id}/'
+        )
+        large_queries = self.delete_queries(
+            admin_client, f'/api/v1/titles/{large.id}/'
+        )
+
+        assert small_queries == large_queries
+        assert not Review.objects.exists()
+        assert not Comment.objects.exists()
+
+    def test_user_delete_keeps_ratings(
+        self, admin_client, anon_client, make_titles, user, admin
+    ):
+        first, second = make_titles(2)
+        Review.objects.create(title=first, author=user, text='-', score=2)
+        Review.objects.create(title=first, author=admin, text='-', score=8)
+        own = Review.objects.create(
+            title=second, author=user, text='-', score=4
+        )
+        Comment.objects.create(review=own, author=admin, text='Чужой')
+        # Ответ попадает в кеш до удаления.
+        anon_client.get(f'/api/v1/titles/{first.id}/')
+
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+
+        assert response.status_code == 204
+        assert Title.objects.get(pk=first.pk).rating == 8
+        assert Title.objects.get(pk=second.pk).rating is None
+        assert not Comment.objects.exists()
+        assert anon_client.get(
+            f'/api/v1/titles/{first.id}/'
+        ).json()['rating'] == 8
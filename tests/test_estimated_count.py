@@ -0,0 +1,83 @@
+import pytest
+from api.v1.cache import bump_versions
+from api.v1.pagination import EstimatedCountPaginator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Genre
+
+
+@pytest.mark.django_db
+class TestEstimatedCount:
+
+    def test_exact_count_on_small_tables(self, anon_client, make_titles):
+        make_titles(3)
+        data = anon_client.get('/api/v1/titles/').json()
+        assert data['count'] == 3
+        assert data['count_approximate'] is False
+
+    def test_estimate_above_threshold(self, anon_client, make_titles,
+                                      monkeypatch, settings):
+        settings.PAGINATION_EXACT_COUNT_THRESHOLD = 100
+        monkeypatch.setattr(
+            EstimatedCountPaginator, 'estimate', lambda self, qs: 500
+        )
+        make_titles(12)
+
+        first = anon_client.get('/api/v1/titles/').json()
+        second = anon_client.get(first['next']).json()
+
+        assert first['count'] == 500
+        assert first['count_approximate'] is True
+        # Следующая страница определяется по данным, а не по оценке.
+        assert len(second['results']) == 2
+        assert second['next'] is None
+        assert anon_client.get('/api/v1/titles/?page=3').status_code == 404
+
+    def count_queries(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            assert client.get(url).status_code == 200
+        return sum(
+            'COUNT(' in query['sql'] for query in context.captured_queries
+        )
+
+    def test_count_cached_per_filter(self, admin_client):
+        assert self.count_queries(admin_client, '/api/v1/users/') == 1
+        assert self.count_queries(admin_client, '/api/v1/users/') == 0
+        assert self.count_queries(
+            admin_client, '/api/v1/users/?search=admin'
+        ) == 1
+
+    def test_count_follows_catalog_writes(self, admin_client):
+        # Кеши между запросами не очищаются: после записи count и ссылка
+        # next не должны остаться от прежнего числа строк.
+        Genre.objects.bulk_create(
+            Genre(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(10)
+        )
+        first = admin_client.get('/api/v1/genres/').json()
+        assert (first['count'], first['next']) == (10, None)
+
+        response = admin_client.post(
+            '/api/v1/genres/', {'name': 'Новый', 'slug': 'genre-new'}
+        )
+        assert response.status_code == 201
+        data = admin_client.get('/api/v1/genres/').json()
+
+        assert data['count'] == 11
+        assert len(admin_client.get(data['next']).json()['results']) == 1
+
+    def test_table_size_decides_estimate(self, anon_client, make_titles,
+                                         monkeypatch, settings):
+        settings.PAGINATION_EXACT_COUNT_THRESHOLD = 100
+        make_titles(3)
+        sizes = iter((5, 500))
+        monkeypatch.setattr(
+            EstimatedCountPaginator, 'table_size',
+            lambda self, queryset: next(sizes),
+        )
+
+        small = anon_client.get('/api/v1/titles/').json()
+        bump_versions('titles-list')
+        large = anon_client.get('/api/v1/titles/').json()
+
+        assert (small['count'], small['count_approximate']) == (3, False)
+        assert (large['count'], large['count_approximate']) == (500, True)
@@ -0,0 +1,83 @@
+import csv
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from reviews.datasets import export_rows
+from reviews.models import Comment, Review, Title
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    @pytest.fixture
+    def reviews(self, make_titles, user, admin):
+        title = make_titles(1)[0]
+        return [
+            Review.objects.create(
+                title=title, author=author, text=f'Отзыв {i}', score=5 + i
+            )
+            for i, author in enumerate((user, admin))
+        ]
+
+    def content(self, response):
+        assert response.streaming
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_uses_upload_db_layout(self, admin_client, reviews):
+        response = admin_client.get('/api/v1/export/review/')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/csv')
+        rows = list(csv.reader(io.StringIO(self.content(response))))
+        assert rows[0] == [
+            'id', 'title_id', 'text', 'author_id', 'score', 'pub_date'
+        ]
+        assert [int(row[0]) for row in rows[1:]] == [r.id for r in reviews]
+
+    def test_ndjson_since_id(self, admin_client, reviews):
+        response = admin_client.get(
+            f'/api/v1/export/review/?format=ndjson&since={reviews[0].id}'
+        )
+        lines = self.content(response).splitlines()
+        assert [json.loads(line)['id'] for line in lines] == [reviews[1].id]
+
+    def test_genre_links(self, admin_client, make_titles):
+        make_titles(2)
+        lines = self.content(
+            admin_client.get('/api/v1/export/genre_title/?format=ndjson')
+        ).splitlines()
+        assert len(lines) == Title.genre.through.objects.count()
+
+    def test_errors(self, admin_client, user_client):
+        assert user_client.get('/api/v1/export/review/').status_code == 403
+        assert admin_client.get('/api/v1/export/nope/').status_code == 404
+        assert admin_client.get(
+            '/api/v1/export/review/?format=xml'
+        ).status_code == 400
+        assert admin_client.get(
+            '/api/v1/export/review/?since=вчера'
+        ).status_code == 400
+
+    def test_dump_db_round_trip(self, tmp_path, reviews, user):
+        Comment.objects.create(review=reviews[0], author=user, text='Да')
+        call_command('dump_db', path=str(tmp_path))
+        assert (tmp_path / 'genre_title.csv').exists()
+        Review.objects.all().delete()
+
+        call_command('upload_db', path=str(tmp_path))
+
+        assert list(
+            Review.objects.order_by('id').values_list('id', 'score', 'pub_date')
+        ) == [(r.id, r.score, r.pub_date) for r in reviews]
+        assert Comment.objects.count() == 1
+        assert Title.objects.get().rating == 5.5
+
+    def test_keyset_chunks_without_server_side_cursors(self, reviews,
+                                                       monkeypatch):
+        monkeypatch.setitem(
+            connection.settings_dict, 'DISABLE_SERVER_SIDE_CURSORS', True
+        )
+        rows = export_rows(Review, ('id', 'score'), chunk_size=1)
+        assert list(rows) == [(r.id, r.score) for r in reviews]
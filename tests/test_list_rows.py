@@ -0,0 +1,50 @@
+import pytest
+from api.v1.renderers import FastJSONRenderer
+from api.v1.rows import CommentRows, ReviewRows, TitleRows
+from api.v1.serializers import (CommentSerializer, ReviewSerializer,
+                                TitleReadSerializer)
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Comment, Review, Title
+
+
+@pytest.mark.django_db
+class TestListRows:
+
+    @pytest.fixture
+    def data(self, make_titles, user, admin):
+        titles = make_titles(4)
+        Title.objects.create(name='Без категории', year=1999)
+        titles[0].description = 'Описание'
+        titles[0].save()
+        for author, score in ((user, 3), (admin, 8)):
+            review = Review.objects.create(
+                title=titles[0], author=author, text='Отзыв', score=score
+            )
+            Comment.objects.create(review=review, author=user, text='Да')
+
+    def assert_parity(self, rows, serializer_class, queryset):
+        expected = serializer_class(queryset, many=True).data
+        actual = rows.to_representation(rows.values(queryset))
+        assert actual == expected
+        assert [list(row) for row in actual] == [
+            list(row) for row in expected
+        ]
+
+    def test_titles(self, data):
+        queryset = Title.objects.select_related('category').order_by('id')
+        self.assert_parity(TitleRows(), TitleReadSerializer, queryset)
+
+    def test_reviews(self, data):
+        queryset = Review.objects.select_related('author', 'title')
+        self.assert_parity(ReviewRows(), ReviewSerializer, queryset)
+
+    def test_comments(self, data):
+        queryset = Comment.objects.select_related('author', 'review')
+        self.assert_parity(CommentRows(), CommentSerializer, queryset)
+
+    def test_renderer_matches_json_renderer(self, data):
+        rows = TitleRows()
+        payload = rows.to_representation(rows.values(Title.objects.all()))
+        assert FastJSONRenderer().render(payload) == (
+            JSONRenderer().render(payload)
+        )
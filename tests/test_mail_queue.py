@@ -0,0 +1,75 @@
+from unittest import mock
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from users.models import OutgoingMail
+
+
+@pytest.mark.django_db
+class TestMailQueue:
+
+    @pytest.fixture(autouse=True)
+    def locmem_email(self, settings):
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.locmem.EmailBackend'
+        )
+
+    def test_signup_only_enqueues(self, anon_client):
+        response = anon_client.post('/api/v1/auth/signup/', {
+            'username': 'newbie', 'email': 'newbie@yamdb.fake'
+        })
+        assert response.status_code == 200
+        assert len(mail.outbox) == 0
+        queued = OutgoingMail.objects.get()
+        assert queued.recipient == 'newbie@yamdb.fake'
+
+        call_command('send_queued_mail')
+
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ['newbie@yamdb.fake']
+        queued.refresh_from_db()
+        assert queued.sent_at is not None
+
+    def test_failed_mail_is_retried_later(self, anon_client):
+        anon_client.post('/api/v1/auth/signup/', {
+            'username': 'newbie', 'email': 'newbie@yamdb.fake'
+        })
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=OSError('relay down'),
+        ):
+            call_command('send_queued_mail')
+        queued = OutgoingMail.objects.get()
+        assert queued.sent_at is None
+        assert queued.attempts == 1
+        assert queued.last_error == 'relay down'
+
+        # Следующая попытка только после задержки.
+        call_command('send_queued_mail')
+        assert len(mail.outbox) == 0
+
+    def test_relay_down_fails_whole_batch(self, anon_client):
+        for name in ('first', 'second'):
+            anon_client.post('/api/v1/auth/signup/', {
+                'username': name, 'email': f'{name}@yamdb.fake'
+            })
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.open',
+            side_effect=ConnectionRefusedError('relay down'),
+        ):
+            call_command('send_queued_mail', loop=False)
+        for queued in OutgoingMail.objects.all():
+            assert queued.sent_at is None
+            assert queued.attempts == 1
+            assert queued.last_error == 'relay down'
+            assert queued.send_after > queued.created
+
+    def test_claimed_mail_is_skipped(self):
+        from users.outbox import claim_batch, enqueue_mail
+
+        enqueue_mail('Тема', 'Текст', 'user@yamdb.fake')
+        now = OutgoingMail.objects.get().send_after
+        assert len(claim_batch(10, 5, now)) == 1
+        # Пачка забрана другим обработчиком до окончания аренды.
+        assert claim_batch(10, 5, now) == []
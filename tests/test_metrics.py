@@ -0,0 +1,53 @@
+import pytest
+from prometheus_client import REGISTRY
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_request_metrics(self, anon_client, genres):
+        labels = {'route': 'api:genres-list', 'method': 'GET'}
+        before = sample('yamdb_http_requests_total', status='200', **labels)
+        queries = sample('yamdb_http_request_db_queries_sum', **labels)
+
+        assert anon_client.get('/api/v1/genres/').status_code == 200
+
+        assert sample(
+            'yamdb_http_requests_total', status='200', **labels
+        ) == before + 1
+        # COUNT и страница жанров.
+        assert sample(
+            'yamdb_http_request_db_queries_sum', **labels
+        ) == queries + 2
+
+    def test_cache_hits_and_misses(self, anon_client, genres):
+        hits = sample(
+            'yamdb_catalog_cache_requests_total',
+            namespace='genres', result='hit',
+        )
+        misses = sample(
+            'yamdb_catalog_cache_requests_total',
+            namespace='genres', result='miss',
+        )
+        anon_client.get('/api/v1/genres/')
+        anon_client.get('/api/v1/genres/')
+        assert sample(
+            'yamdb_catalog_cache_requests_total',
+            namespace='genres', result='miss',
+        ) == misses + 1
+        assert sample(
+            'yamdb_catalog_cache_requests_total',
+            namespace='genres', result='hit',
+        ) == hits + 1
+
+    def test_metrics_endpoint(self, anon_client):
+        anon_client.get('/api/v1/genres/')
+        response = anon_client.get('/metrics')
+        assert response.status_code == 200
+        body = response.content.decode()
+        assert 'yamdb_http_request_duration_seconds_bucket' in body
+        assert 'yamdb_workers 1.0' in body
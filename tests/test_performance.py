@@ -0,0 +1,235 @@
+import os
+import time
+from collections import namedtuple
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+from .fixtures.fixture_perf import PERF_REPEAT
+
+# Допустимое время ответа (p99) в миллисекундах, одно на все эндпойнты.
+P99_BUDGET_MS = float(os.getenv('YAMDB_PERF_P99_MS', 500))
+
+Case = namedtuple('Case', 'name max_queries status prepare')
+
+
+def _title_url(data, i=0):
+    return f'/api/v1/titles/{data.titles[i].id}/'
+
+
+def _review_url(data, i=0):
+    review = data.reviews[i]
+    return f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+
+
+def _fresh_title(data, i):
+    return Title.objects.create(
+        name=f'Удаляемое {i}', year=2000, category=data.categories[0]
+    )
+
+
+def _own_review(data, i):
+    return Review.objects.create(
+        title=data.titles[i], author=data.author, text='Свой', score=5
+    )
+
+
+def _own_comment(data, i):
+    return Comment.objects.create(
+        review=data.reviews[0], author=data.author, text='Свой'
+    )
+
+
+def _new_user(data, i):
+    return User.objects.create(
+        username=f'perf-new-{i}', email=f'perf-new-{i}@yamdb.fake'
+    )
+
+
+# На PostgreSQL первый список по страницам читает размер таблицы из
+# pg_class (api.v1.pagination), дальше размер берётся из кеша.
+TABLE_SIZE = int(connection.vendor == 'postgresql')
+
+# В бюджеты запросов на запись входит проверка пользователя из токена по
+# основной базе (api.v1.authentication).
+CASES = (
+    # Произведения.
+    Case('titles-list', 3 + TABLE_SIZE, 200, lambda d, i: (
+        d.anon_client, 'get', '/api/v1/titles/', None)),
+    # Места, строки произведений и их жанры.
+    Case('titles-top', 3, 200, lambda d, i: (
+        d.anon_client, 'get', '/api/v1/titles/top/', None)),
+    # Соседи, строки произведений и их жанры.
+    Case('titles-similar', 3, 200, lambda d, i: (
+        d.anon_client, 'get', f'{_title_url(d, i)}similar/', None)),
+    Case('titles-detail', 2, 200, lambda d, i: (
+        d.anon_client, 'get', _title_url(d, i), None)),
+    Case('titles-create', 8, 201, lambda d, i: (
+        d.admin_client, 'post', '/api/v1/titles/', {
+            'name': f'Новое {i}', 'year': 2001,
+            'category': d.categories[0].slug,
+            'genre': [g.slug for g in d.genres[:3]],
+        })),
+    Case('titles-update', 9, 200, lambda d, i: (
+        d.admin_client, 'patch', _title_url(d, i), {
+            'name': f'Изменённое {i}',
+            'genre': [g.slug for g in d.genres[:2]],
+        })),
+    # На SQLite произведения вставляются поштучно (нет RETURNING).
+    Case('titles-bulk', 11, 201, lambda d, i: (
+        d.admin_client, 'post', '/api/v1/titles/bulk/', [{
+            'name': f'Пакетное {i}-{j}', 'year': 2001,
+            'category': d.categories[0].slug,
+            'genre': [g.slug for g in d.genres[:3]],
+        } for j in range(5)])),
+    # Отзывы и комментарии удаляются одним DELETE на таблицу, число
+    # запросов не зависит от числа отзывов. Удаление включает строки
+    # рейтинга и похожих произведений.
+    Case('titles-delete', 13, 204, lambda d, i: (
+        d.admin_client, 'delete',
+        f'/api/v1/titles/{_fresh_title(d, i).id}/', None)),
+    # Жанры и категории. Удаление включает строки рейтинга (TitleRank).
+    Case('genres-list', 2 + TABLE_SIZE, 200, lambda d, i: (
+        d.anon_client, 'get', '/api/v1/genres/', None)),
+    Case('genres-create', 3, 201, lambda d, i: (
+        d.admin_client, 'post', '/api/v1/genres/',
+        {'name': f'Новый {i}', 'slug': f'new-genre-{i}'})),
+    Case('genres-delete', 6, 204, lambda d, i: (
+        d.admin_client, 'delete', '/api/v1/genres/{}/'.format(
+            Genre.objects.create(name='Удаляемый', slug=f'del-{i}').slug
+        ), None)),
+    Case('categories-list', 2 + TABLE_SIZE, 200, lambda d, i: (
+        d.anon_client, 'get', '/api/v1/categories/', None)),
+    Case('categories-create', 3, 201, lambda d, i: (
+        d.admin_client, 'post', '/api/v1/categories/',
+        {'name': f'Новая {i}', 'slug': f'new-category-{i}'})),
+    Case('categories-delete', 5, 204, lambda d, i: (
+        d.admin_client, 'delete', '/api/v1/categories/{}/'.format(
+            Category.objects.create(name='Удаляемая', slug=f'del-{i}').slug
+        ), None)),
+    # Отзывы. Запись отзыва обновляет места произведения в рейтинге
+    # (reviews.ranking) одним UPDATE.
+    Case('reviews-list', 2 + TABLE_SIZE, 200, lambda d, i: (
+        d.anon_client, 'get', f'{_title_url(d, i)}reviews/', None)),
+    Case('reviews-list-cursor', 1, 200, lambda d, i: (
+        d.anon_client, 'get',
+        f'{_title_url(d, i)}reviews/?pagination=cursor', None)),
+    Case('reviews-detail', 1, 200, lambda d, i: (
+        d.anon_client, 'get', _review_url(d, i), None)),
+    Case('reviews-create', 8, 201, lambda d, i: (
+        d.author_client, 'post', f'{_title_url(d, i)}reviews/',
+        {'text': 'Новый отзыв', 'score': 7})),
+    # Прежняя оценка перечитывается под блокировкой строки.
+    Case('reviews-update', 8, 200, lambda d, i: (
+        d.author_client, 'patch',
+        f'{_title_url(d, i)}reviews/{_own_review(d, i).id}/',
+        {'score': 9})),
+    Case('reviews-delete', 6, 204, lambda d, i: (
+        d.author_client, 'delete',
+        f'{_title_url(d, i)}reviews/{_own_review(d, i).id}/', None)),
+    # Комментарии.
+    Case('comments-list', 2 + TABLE_SIZE, 200, lambda d, i: (
+        d.anon_client, 'get', f'{_review_url(d)}comments/', None)),
+    Case('comments-list-cursor', 1, 200, lambda d, i: (
+        d.anon_client, 'get', f'{_review_url(d)}comments/?pagination=cursor',
+        None)),
+    Case('comments-detail', 1, 200, lambda d, i: (
+        d.anon_client, 'get',
+        f'{_review_url(d)}comments/{_own_comment(d, i).id}/', None)),
+    Case('comments-create', 3, 201, lambda d, i: (
+        d.author_client, 'post', f'{_review_url(d)}comments/',
+        {'text': 'Новый комментарий'})),
+    Case('comments-update', 3, 200, lambda d, i: (
+        d.author_client, 'patch',
+        f'{_review_url(d)}comments/{_own_comment(d, i).id}/',
+        {'text': 'Изменённый'})),
+    Case('comments-delete', 3, 204, lambda d, i: (
+        d.author_client, 'delete',
+        f'{_review_url(d)}comments/{_own_comment(d, i).id}/', None)),
+    # Пользователи.
+    Case('users-list', 2 + TABLE_SIZE, 200, lambda d, i: (
+        d.admin_client, 'get', '/api/v1/users/', None)),
+    Case('users-detail', 1, 200, lambda d, i: (
+        d.admin_client, 'get', f'/api/v1/users/{d.users[i].username}/',
+        None)),
+    Case('users-create', 4, 201, lambda d, i: (
+        d.admin_client, 'post', '/api/v1/users/',
+        {'username': f'created-{i}', 'email': f'created-{i}@yamdb.fake'})),
+    Case('users-update', 3, 200, lambda d, i: (
+        d.admin_client, 'patch', f'/api/v1/users/{d.users[i].username}/',
+        {'bio': f'Биография {i}'})),
+    Case('users-delete', 13, 204, lambda d, i: (
+        d.admin_client, 'delete',
+        f'/api/v1/users/{_new_user(d, i).username}/', None)),
+    Case('users-me', 1, 200, lambda d, i: (
+        d.author_client, 'get', '/api/v1/users/me/', None)),
+    Case('users-me-update', 3, 200, lambda d, i: (
+        d.author_client, 'patch', '/api/v1/users/me/',
+        {'bio': f'Биография {i}'})),
+    # Выгрузка: на SQLite строки читаются одним запросом (пачки
+    # fetchmany), на PostgreSQL - курсором на стороне сервера.
+    Case('export', 1, 200, lambda d, i: (
+        d.admin_client, 'get', '/api/v1/export/review/', None)),
+    # Регистрация и токен.
+    Case('auth-signup', 5, 200, lambda d, i: (
+        d.anon_client, 'post', '/api/v1/auth/signup/',
+        {'username': f'signup-{i}', 'email': f'signup-{i}@yamdb.fake'})),
+    Case('auth-token', 1, 200, lambda d, i: (
+        d.anon_client, 'post', '/api/v1/auth/token/', {
+            'username': d.users[i].username,
+            'confirmation_code': default_token_generator.make_token(
+                d.users[i]
+            ),
+        })),
+)
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(0, -(-len(ordered) * percent // 100) - 1)
+    return ordered[int(index)]
+
+
+@pytest.mark.django_db
+class TestPerformanceBudget:
+
+    @pytest.mark.parametrize('case', CASES, ids=[c.name for c in CASES])
+    def test_endpoint_budget(self, case, perf_data, perf_report, settings):
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+        timings = []
+        queries = []
+        for i in range(PERF_REPEAT):
+            client, method, url, payload = case.prepare(perf_data, i)
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = getattr(client, method)(url, payload, format='json')
+                if response.streaming:
+                    # Потоковый ответ читает базу при обходе.
+                    b''.join(response.streaming_content)
+                timings.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == case.status, (
+                f'{case.name}: {method.upper()} {url} вернул '
+                f'{response.status_code}: {response.content[:300]}'
+            )
+            queries.append(len(context.captured_queries))
+
+        result = {
+            'queries': max(queries),
+            'max_queries': case.max_queries,
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+        }
+        perf_report['endpoints'][case.name] = result
+
+        assert result['queries'] <= case.max_queries, (
+            f'{case.name}: {result["queries"]} SQL-запросов при бюджете '
+            f'{case.max_queries}'
+        )
+        assert result['p99_ms'] <= P99_BUDGET_MS, (
+            f'{case.name}: p99 {result["p99_ms"]} мс при бюджете '
+            f'{P99_BUDGET_MS} мс'
+        )
@@ -0,0 +1,61 @@
+import json
+import logging
+
+import pytest
+
+
+@pytest.mark.django_db
+class TestPerformanceMiddleware:
+
+    @pytest.fixture(autouse=True)
+    def sampled(self, settings):
+        settings.PERF_SAMPLE_RATE = 1
+        settings.PERF_SLOW_REQUEST_MS = 60_000
+
+    def test_server_timing_header(self, anon_client, make_titles):
+        make_titles(2)
+        response = anon_client.get('/api/v1/titles/')
+        sections = {
+            part.strip().split(';')[0]: part
+            for part in response['Server-Timing'].split(',')
+        }
+        assert set(sections) == {'db', 'serialize', 'render', 'total'}
+        assert 'desc="3 queries"' in sections['db']
+
+    def test_log_line(self, anon_client, genres, caplog):
+        with caplog.at_level(logging.INFO, 'api_yamdb.performance'):
+            anon_client.get('/api/v1/genres/')
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record['path'] == '/api/v1/genres/'
+        assert record['status'] == 200
+        assert record['queries'] == 2
+        assert {'db_ms', 'serialize_ms', 'render_ms', 'total_ms'} <= set(
+            record
+        )
+
+    def test_not_sampled(self, anon_client, settings):
+        settings.PERF_SAMPLE_RATE = 0
+        response = anon_client.get('/api/v1/genres/')
+        assert not response.has_header('Server-Timing')
+
+    def test_slow_request_logs_sql(self, anon_client, settings, caplog):
+        settings.PERF_SLOW_REQUEST_MS = 0
+        with caplog.at_level(logging.INFO, 'api_yamdb.performance'):
+            anon_client.get('/api/v1/genres/')
+        slow = [
+            json.loads(r.getMessage()) for r in caplog.records
+            if r.levelno == logging.WARNING
+        ]
+        assert slow and slow[0]['slow'] is True
+        assert any('reviews_genre' in q['sql'] for q in slow[0]['sql'])
+
+    def test_slow_request_outside_sample_logs_sql(self, anon_client,
+                                                  settings, caplog):
+        settings.PERF_SAMPLE_RATE = 0
+        settings.PERF_SLOW_REQUEST_MS = 0
+        with caplog.at_level(logging.INFO, 'api_yamdb.performance'):
+            response = anon_client.get('/api/v1/genres/')
+        assert not response.has_header('Server-Timing')
+        [record] = [json.loads(r.getMessage()) for r in caplog.records]
+        assert record['slow'] is True
+        assert any('reviews_genre' in q['sql'] for q in record['sql'])
@@ -0,0 +1,70 @@
+import pytest
+from django.core.management import call_command
+from reviews.models import Review, SimilarTitle
+
+pytest.importorskip('scipy')
+
+
+@pytest.fixture
+def fans(django_user_model):
+    return [
+        django_user_model.objects.create_user(
+            username=f'fan-{i}', email=f'fan-{i}@yamdb.fake'
+        )
+        for i in range(3)
+    ]
+
+
+def similar_ids(client, title):
+    response = client.get(f'/api/v1/titles/{title.id}/similar/')
+    assert response.status_code == 200, response.content
+    return [row['id'] for row in response.json()]
+
+
+@pytest.mark.django_db
+class TestSimilarTitles:
+
+    def test_genres_and_fans(self, anon_client, make_titles, fans):
+        # Жанры: 0 - [0], 1 - [0, 1], 2 - [0, 1, 2], 3 - [0..3].
+        titles = make_titles(4)
+        for title in (titles[0], titles[3]):
+            for fan in fans:
+                Review.objects.create(
+                    title=title, author=fan, text='.', score=9
+                )
+        Review.objects.create(
+            title=titles[1], author=fans[0], text='.', score=3
+        )
+        call_command('build_similar_titles', k=2, chunk_size=3)
+
+        assert SimilarTitle.objects.count() == 4 * 2
+        # Общие поклонники важнее ближайшего набора жанров.
+        assert similar_ids(anon_client, titles[0]) == [
+            titles[3].id, titles[1].id
+        ]
+        # Низкая оценка не делает пользователя поклонником.
+        assert similar_ids(anon_client, titles[1])[0] == titles[2].id
+        data = anon_client.get(f'/api/v1/titles/{titles[2].id}/similar/')
+        row = data.json()[0]
+        assert row['id'] == titles[3].id
+        assert row['genre'][0] == {'name': 'Жанр 0', 'slug': 'genre-0'}
+        assert 0 < row['similarity'] <= 1
+
+    def test_genre_weight(self, anon_client, make_titles, fans):
+        titles = make_titles(4)
+        for title in (titles[0], titles[3]):
+            Review.objects.create(
+                title=title, author=fans[0], text='.', score=10
+            )
+        call_command('build_similar_titles', k=1, genre_weight=1)
+        assert similar_ids(anon_client, titles[0]) == [titles[1].id]
+
+    def test_rebuild_invalidates_cache(self, anon_client, make_titles):
+        titles = make_titles(2)
+        assert similar_ids(anon_client, titles[0]) == []
+        call_command('build_similar_titles')
+        assert similar_ids(anon_client, titles[0]) == [titles[1].id]
+
+    def test_missing_title(self, anon_client):
+        response = anon_client.get('/api/v1/titles/1/similar/')
+        assert response.status_code == 404
@@ -0,0 +1,83 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Comment, Review
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+
+    def get(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200, response.content
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        return response.json(), len(context.captured_queries), sql
+
+    def test_titles_list_fields(self, anon_client, make_titles):
+        make_titles(3)
+        data, queries, sql = self.get(
+            anon_client, '/api/v1/titles/?fields=id,name,rating'
+        )
+        assert [list(item) for item in data['results']] == [
+            ['id', 'name', 'rating']
+        ] * 3
+        # COUNT и страница, без запроса жанров и JOIN категорий.
+        assert queries == 2
+        assert 'description' not in sql
+        assert 'reviews_category' not in sql
+
+    def test_titles_list_omit(self, anon_client, make_titles):
+        make_titles(2)
+        data, queries, sql = self.get(
+            anon_client, '/api/v1/titles/?omit=description,genre'
+        )
+        assert list(data['results'][0]) == [
+            'id', 'name', 'year', 'rating', 'category'
+        ]
+        assert data['results'][0]['category']['slug'] == 'category-0'
+        assert queries == 2
+        assert 'description' not in sql
+
+    def test_title_detail(self, anon_client, make_titles):
+        title = make_titles(1)[0]
+        data, queries, sql = self.get(
+            anon_client, f'/api/v1/titles/{title.id}/?fields=name,genre'
+        )
+        assert data == {
+            'name': title.name,
+            'genre': [{'name': 'Жанр 0', 'slug': 'genre-0'}],
+        }
+        assert 'description' not in sql
+        assert 'reviews_category' not in sql
+
+    def test_reviews_and_comments(self, anon_client, make_titles, user):
+        title = make_titles(1)[0]
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=4
+        )
+        comment = Comment.objects.create(
+            review=review, author=user, text='Комментарий'
+        )
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        data, _, sql = self.get(anon_client, f'{url}?fields=id,score')
+        assert data['results'] == [{'id': review.id, 'score': 4}]
+        assert 'users_user' not in sql
+        data, _, sql = self.get(
+            anon_client,
+            f'{url}{review.id}/comments/{comment.id}/?omit=review,pub_date',
+        )
+        assert data == {
+            'id': comment.id, 'author': user.username, 'text': 'Комментарий'
+        }
+
+    def test_users_me(self, user_client, user):
+        data, _, _ = self.get(user_client, '/api/v1/users/me/?fields=role')
+        assert data == {'role': user.role}
+
+    def test_writes_return_all_fields(self, user_client, user):
+        response = user_client.patch(
+            '/api/v1/users/me/?fields=role', {'bio': 'Новая'}, format='json'
+        )
+        assert response.json()['bio'] == 'Новая'
+        assert 'username' in response.json()
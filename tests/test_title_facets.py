@@ -0,0 +1,76 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Title
+
+
+def counts(rows, key='slug'):
+    return {row[key]: row['count'] for row in rows}
+
+
+@pytest.mark.django_db
+class TestTitleFacets:
+
+    @pytest.fixture
+    def titles(self, make_titles):
+        titles = make_titles(6)
+        Title.objects.filter(pk=titles[0].pk).update(year=1995)
+        Title.objects.filter(pk=titles[1].pk).update(year=-5)
+        return titles
+
+    def test_facets(self, anon_client, titles):
+        response = anon_client.get('/api/v1/titles/?facets=true')
+        assert response.status_code == 200
+        data = response.json()
+        assert data['count'] == 6
+        facets = data['facets']
+        assert counts(facets['genre']) == {
+            'genre-0': 6, 'genre-1': 4, 'genre-2': 3, 'genre-3': 2,
+            'genre-4': 1,
+        }
+        assert facets['genre'][0] == {
+            'slug': 'genre-0', 'name': 'Жанр 0', 'count': 6
+        }
+        assert counts(facets['category']) == {
+            'category-0': 2, 'category-1': 2, 'category-2': 2,
+        }
+        assert facets['year'] == [
+            {'from': 2000, 'to': 2009, 'count': 4},
+            {'from': 1990, 'to': 1999, 'count': 1},
+            {'from': -10, 'to': -1, 'count': 1},
+        ]
+
+    def test_facets_follow_filters(self, anon_client, titles):
+        facets = anon_client.get(
+            '/api/v1/titles/?genre=genre-2&facets=1'
+        ).json()['facets']
+        assert counts(facets['genre']) == {
+            'genre-0': 3, 'genre-1': 3, 'genre-2': 3, 'genre-3': 2,
+            'genre-4': 1,
+        }
+        assert counts(facets['category']) == {
+            'category-0': 1, 'category-1': 1, 'category-2': 1,
+        }
+        assert counts(facets['year'], 'from') == {2000: 3}
+
+    def test_without_facets(self, anon_client, titles):
+        assert 'facets' not in anon_client.get('/api/v1/titles/').json()
+
+    def test_grouped_queries_and_cache(self, anon_client, titles,
+                                       admin_client):
+        anon_client.get('/api/v1/titles/?facets=true')
+        with CaptureQueriesContext(connection) as facet_context:
+            anon_client.get('/api/v1/titles/?facets=true&year=2002')
+        with CaptureQueriesContext(connection) as plain_context:
+            anon_client.get('/api/v1/titles/?year=2003')
+        # По одному запросу на жанры, категории и годы.
+        assert len(facet_context.captured_queries) == (
+            len(plain_context.captured_queries) + 3
+        )
+        with CaptureQueriesContext(connection) as context:
+            anon_client.get('/api/v1/titles/?facets=true')
+        assert not context.captured_queries
+
+        admin_client.delete(f'/api/v1/titles/{titles[5].id}/')
+        facets = anon_client.get('/api/v1/titles/?facets=true').json()
+        assert counts(facets['facets']['genre'])['genre-0'] == 5
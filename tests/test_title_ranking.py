@@ -0,0 +1,119 @@
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Review, Title, TitleRank
+from reviews.ranking import get_mean_score, rebuild_ranking
+
+
+def add_reviews(title, users, scores):
+    for user, score in zip(users, scores):
+        Review.objects.create(title=title, author=user, text='.', score=score)
+
+
+@pytest.fixture
+def reviewers(django_user_model):
+    return [
+        django_user_model.objects.create_user(
+            username=f'reviewer-{i}', email=f'reviewer-{i}@yamdb.fake'
+        )
+        for i in range(6)
+    ]
+
+
+@pytest.fixture
+def ranked(make_titles, reviewers, settings):
+    settings.TITLES_TOP_PRIOR_VOTES = 3
+    # 0: одна десятка, 1: много высоких оценок, 2: средние оценки.
+    titles = make_titles(4)
+    add_reviews(titles[0], reviewers, [10])
+    add_reviews(titles[1], reviewers, [9, 9, 8, 9, 9, 8])
+    add_reviews(titles[2], reviewers, [5, 6, 5, 6])
+    rebuild_ranking()
+    return titles
+
+
+def top_ids(client, query=''):
+    response = client.get(f'/api/v1/titles/top/{query}')
+    assert response.status_code == 200, response.content
+    return [row['id'] for row in response.json()]
+
+
+@pytest.mark.django_db
+class TestTitleRanking:
+
+    def test_single_high_score_does_not_lead(self, anon_client, ranked):
+        response = anon_client.get('/api/v1/titles/top/')
+        data = response.json()
+        assert [row['id'] for row in data] == [
+            ranked[1].id, ranked[0].id, ranked[2].id
+        ]
+        # Без отзывов произведение в рейтинг не попадает.
+        assert ranked[3].id not in {row['id'] for row in data}
+        assert data[0]['name'] == ranked[1].name
+        assert data[0]['genre'] == [{'name': 'Жанр 0', 'slug': 'genre-0'}, {
+            'name': 'Жанр 1', 'slug': 'genre-1'
+        }]
+        assert data[0]['weighted_rating'] > data[1]['weighted_rating']
+
+    def test_slices(self, anon_client, ranked):
+        # Жанр 1 есть у произведений 1, 2 и 3; категории - по кругу.
+        assert top_ids(anon_client, '?genre=genre-1') == [
+            ranked[1].id, ranked[2].id
+        ]
+        assert top_ids(anon_client, '?category=category-0') == [
+            ranked[0].id
+        ]
+        assert top_ids(anon_client, '?genre=missing') == []
+
+    def test_limit(self, anon_client, ranked):
+        assert top_ids(anon_client, '?limit=1') == [ranked[1].id]
+        assert anon_client.get('/api/v1/titles/top/?limit=0').status_code \
+            == 400
+        response = anon_client.get(
+            '/api/v1/titles/top/?genre=genre-0&category=category-0'
+        )
+        assert response.status_code == 400
+
+    def test_constant_queries(self, anon_client, ranked):
+        with CaptureQueriesContext(connection) as context:
+            anon_client.get('/api/v1/titles/top/?genre=genre-0')
+        # Места, строки произведений и их жанры.
+        assert len(context.captured_queries) == 3
+
+    def test_review_writes_update_ranking(self, anon_client, ranked,
+                                          reviewers):
+        add_reviews(ranked[3], reviewers, [10, 10, 10, 10, 10, 10])
+        assert top_ids(anon_client)[0] == ranked[3].id
+        assert TitleRank.objects.filter(title=ranked[3]).count() == 1 + 1 + 4
+
+        for review in Review.objects.filter(title=ranked[1]):
+            review.score = 1
+            review.save()
+        assert top_ids(anon_client)[-1] == ranked[1].id
+
+        Review.objects.get(title=ranked[0]).delete()
+        assert ranked[0].id not in top_ids(anon_client)
+
+    def test_mean_score_shared_through_db(self, ranked, settings):
+        # Другой процесс с пустым кешем берёт C последнего пересчёта из
+        # базы, а не суммирует оценки всех произведений.
+        mean = get_mean_score()
+        caches[settings.CATALOG_CACHE_ALIAS].clear()
+        with CaptureQueriesContext(connection) as context:
+            assert get_mean_score() == mean
+        assert len(context.captured_queries) == 1
+        assert 'SUM(' not in context.captured_queries[0]['sql']
+
+    def test_command_refreshes_cached_top(self, anon_client, ranked,
+                                          reviewers):
+        assert top_ids(anon_client) == [
+            ranked[1].id, ranked[0].id, ranked[2].id
+        ]
+        # Запись в обход сигналов: места обновит только пересчёт.
+        Title.objects.filter(pk=ranked[3].id).update(
+            rating_sum=60, rating_count=6
+        )
+        call_command('rebuild_ranking')
+        assert top_ids(anon_client)[0] == ranked[3].id
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+from reviews.models import Title
+
+
+@pytest.mark.django_db
+class TestTitleBulk:
+    url = '/api/v1/titles/bulk/'
+
+    def items(self, categories, genres, count):
+        return [{
+            'name': f'Пакетное {i}',
+            'year': 1990 + i,
+            'category': categories[i % len(categories)].slug,
+            'genre': [genre.slug for genre in genres[:2]],
+        } for i in range(count)]
+
+    def test_json_array(self, admin_client, categories, genres):
+        response = admin_client.post(
+            self.url, self.items(categories, genres, 5), format='json'
+        )
+        assert response.status_code == 201
+        assert response.json()['written'] == 5
+        ids = [result['id'] for result in response.json()['results']]
+        assert Title.objects.filter(id__in=ids).count() == 5
+        assert Title.genre.through.objects.filter(title_id__in=ids).count() \
+            == 10
+
+    def test_ndjson_partial(self, admin_client, categories, genres):
+        items = self.items(categories, genres, 3)
+        items[1]['genre'] = ['missing']
+        body = '\n'.join(json.dumps(item) for item in items) + '\n{oops\n'
+        response = admin_client.generic(
+            'POST', f'{self.url}?mode=partial', body,
+            content_type='application/x-ndjson',
+        )
+        assert response.status_code == 207
+        statuses = [r['status'] for r in response.json()['results']]
+        assert statuses == [201, 400, 201, 400]
+        assert Title.objects.count() == 2
+
+    def test_atomic_rolls_back(self, admin_client, categories, genres):
+        items = self.items(categories, genres, 3)
+        items[2]['year'] = 3000
+        response = admin_client.post(self.url, items, format='json')
+        assert response.status_code == 400
+        statuses = [r['status'] for r in response.json()['results']]
+        assert statuses == [424, 424, 400]
+        assert not Title.objects.exists()
+
+    def test_update_by_id(self, admin_client, make_titles, genres):
+        title = make_titles(1)[0]
+        response = admin_client.post(self.url, [
+            {'id': title.id, 'name': 'Переименовано',
+             'genre': [genres[-1].slug]},
+            {'id': 10 ** 6, 'name': 'Нет такого'},
+        ], format='json')
+        assert response.status_code == 400
+        assert [r['status'] for r in response.json()['results']] == [424, 404]
+
+        response = admin_client.post(f'{self.url}?mode=partial', [
+            {'id': title.id, 'name': 'Переименовано',
+             'genre': [genres[-1].slug]},
+        ], format='json')
+        assert response.status_code == 200
+        title.refresh_from_db()
+        assert title.name == 'Переименовано'
+        assert list(title.genre.all()) == [genres[-1]]
+        detail = admin_client.get(f'/api/v1/titles/{title.id}/').json()
+        assert detail['name'] == 'Переименовано'
+
+    @pytest.mark.parametrize('body', ('5', 'null', 'true', '"x"', '{}'))
+    def test_not_array(self, admin_client, body):
+        response = admin_client.generic(
+            'POST', self.url, body, content_type='application/json'
+        )
+        assert response.status_code == 400
+
+    def test_admin_only(self, user_client, categories, genres):
+        response = user_client.post(
+            self.url, self.items(categories, genres, 1), format='json'
+        )
+        assert response.status_code == 403
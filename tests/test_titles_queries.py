@@ -0,0 +1,32 @@
+import pytest
+from django.db import connection
+
+
+@pytest.mark.django_db
+class TestTitleQueries:
+    url = '/api/v1/titles/'
+
+    @pytest.mark.parametrize('count', (1, 10))
+    def test_list_query_count(self, anon_client, make_titles,
+                              django_assert_num_queries, count):
+        make_titles(count)
+        # COUNT для пагинации, страница с категориями, жанры одним запросом;
+        # на PostgreSQL ещё размер таблицы из pg_class.
+        with django_assert_num_queries(
+            3 + (connection.vendor == 'postgresql')
+        ):
+            response = anon_client.get(self.url)
+        assert response.status_code == 200
+        assert len(response.json()['results']) == count
+        assert all(
+            item['genre'] and item['category']
+            for item in response.json()['results']
+        )
+
+    def test_retrieve_query_count(self, anon_client, make_titles,
+                                  django_assert_num_queries):
+        title = make_titles(5)[-1]
+        with django_assert_num_queries(2):
+            response = anon_client.get(f'{self.url}{title.id}/')
+        assert response.status_code == 200
+        assert len(response.json()['genre']) == title.genre.count()
@@ -0,0 +1,80 @@
+import pytest
+from reviews.models import Genre
+
+
+@pytest.mark.django_db
+class TestTitleWrite:
+    url = '/api/v1/titles/'
+
+    def payload(self, categories, genres, **kwargs):
+        return {
+            'name': 'Новое',
+            'year': 2000,
+            'category': categories[0].slug,
+            'genre': [genre.slug for genre in genres],
+            **kwargs,
+        }
+
+    def test_slugs_resolved_from_memory(self, admin_client, categories,
+                                        genres, django_assert_num_queries):
+        admin_client.post(
+            self.url, self.payload(categories, genres), format='json'
+        )
+        # Ни одного запроса по slug: INSERT, genre.set() (три запроса)
+        # и чтение жанров для ответа.
+        with django_assert_num_queries(5):
+            response = admin_client.post(
+                self.url, self.payload(categories, genres), format='json'
+            )
+        assert response.status_code == 201
+        assert response.json()['genre'] == [g.slug for g in genres]
+        assert response.json()['category'] == categories[0].slug
+
+    def test_unknown_slugs_keep_errors(self, admin_client, categories,
+                                       genres):
+        response = admin_client.post(self.url, self.payload(
+            categories, genres[:1],
+            genre=[genres[0].slug, 'missing'], category='nope',
+        ), format='json')
+        assert response.status_code == 400
+        assert response.json() == {
+            'genre': ['Object with slug=missing does not exist.'],
+            'category': ['Object with slug=nope does not exist.'],
+        }
+
+    def test_new_genre_visible_after_save(self, admin_client, categories,
+                                          genres):
+        admin_client.post(
+            self.url, self.payload(categories, genres), format='json'
+        )
+        genre = Genre.objects.create(name='Свежий', slug='fresh')
+        response = admin_client.post(
+            self.url, self.payload(categories, [genre]), format='json'
+        )
+        assert response.status_code == 201
+
+    def test_genre_inserted_without_signal(self, admin_client, categories,
+                                           genres):
+        admin_client.post(
+            self.url, self.payload(categories, genres), format='json'
+        )
+        genre, = Genre.objects.bulk_create(
+            [Genre(name='Без сигнала', slug='silent')]
+        )
+        response = admin_client.post(
+            self.url, self.payload(categories, [genre]), format='json'
+        )
+        assert response.status_code == 201
+
+    def test_table_expires(self, admin_client, categories, genres,
+                           monkeypatch):
+        gone = Genre.objects.create(name='Удалённый', slug='gone')
+        admin_client.post(
+            self.url, self.payload(categories, genres), format='json'
+        )
+        monkeypatch.setattr('api.v1.fields.SLUG_TABLE_TTL', 0)
+        Genre.objects.filter(pk=gone.pk)._raw_delete('default')
+        response = admin_client.post(
+            self.url, self.payload(categories, [gone]), format='json'
+        )
+        assert response.status_code == 400
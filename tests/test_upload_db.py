@@ -0,0 +1,61 @@
+import pytest
+from django.core.management import call_command
+from reviews.models import Genre, RankingMean, Review, TitleRank
+
+
+def write_csv(path, name, lines):
+    (path / name).write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+
+@pytest.mark.django_db
+class TestUploadDb:
+
+    @pytest.fixture
+    def data(self, tmp_path):
+        write_csv(tmp_path, 'genre.csv', [
+            'id,name,slug', '1,Драма,drama', '2,Комедия,comedy',
+        ])
+        return tmp_path
+
+    def test_rerun_reports_inserted_rows(self, data, capsys):
+        call_command('upload_db', path=str(data))
+        assert 'genre.csv: 2 строк' in capsys.readouterr().out
+        call_command('upload_db', path=str(data))
+        assert 'genre.csv: 0 строк' in capsys.readouterr().out
+        assert Genre.objects.count() == 2
+
+    def test_failed_truncate_load_keeps_tables(self, data, make_titles):
+        make_titles(1)
+        genres = Genre.objects.count()
+        write_csv(data, 'review.csv', [
+            'id,title_id,text,author_id,score,pub_date',
+            '1,1,Отзыв,1,пять,2020-01-01 00:00:00',
+        ])
+        with pytest.raises(ValueError):
+            call_command('upload_db', path=str(data), truncate=True)
+        assert Genre.objects.count() == genres
+
+    def test_auto_now_add_untouched(self, data):
+        call_command('upload_db', path=str(data))
+        field = Review._meta.get_field('pub_date')
+        assert field.auto_now_add
+
+    def test_catalog_cache_invalidated(self, data):
+        from api.v1.cache import get_versions
+
+        names = ['titles', 'genres', 'categories']
+        before = get_versions(names)
+        call_command('upload_db', path=str(data))
+        assert all(
+            new > old for new, old in zip(get_versions(names), before)
+        )
+
+    def test_ranking_rebuilt(self, data, make_titles, user):
+        title = make_titles(1)[0]
+        write_csv(data, 'review.csv', [
+            'id,title_id,text,author_id,score,pub_date',
+            f'1,{title.id},Отзыв,{user.id},9,2020-01-01 00:00:00+00:00',
+        ])
+        call_command('upload_db', path=str(data))
+        assert TitleRank.objects.filter(title=title).exists()
+        assert RankingMean.objects.get().score == 9